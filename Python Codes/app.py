@@ -1,33 +1,141 @@
 # app.py
-from flask import Flask, render_template, request, redirect, session, jsonify, send_file, url_for
+from flask import Flask, render_template, request, redirect, session, jsonify, send_file, url_for, g, flash
+import atexit
+import multiprocessing
 import sqlite3
-import base64
-import numpy as np
-import cv2
 import time
+import uuid
 import os
-import bcrypt
+from concurrent.futures import TimeoutError as FutureTimeout
+from collections import namedtuple
 from io import BytesIO
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
 from datetime import datetime
-from emotion_detection import detect_emotion
+from face_analysis import analyze_frame, face_mesh_engine
+from frame_ingest import decode_data_url, decode_jpeg
+from batch_inference import BatchInferenceScheduler
+from capture_policy import CapturePolicy
+from db_pool import ConnectionPool, DatabaseWriter
+from migrations import apply_migrations
+from model_manager import ModelManager
+from inference_pool import InferencePool, InvalidFrame, PoolBusy, WorkerCrashed
+from inference_backend import load_backend
+from password_hasher import HasherBusy, PasswordHasher
+from certificates import CertificateCache, certificate_key, clamp_percentage, template_for, today
+from event_log import EventWriter
+from frame_gate import FrameChangeGate
+from question_cache import QuestionBank, fetch_question_page, grade, parse_choice, parse_page_id
+from question_import import (FORMATS as IMPORT_FORMATS, INSERT_QUESTION, detect_format, import_questions, open_text,
+                             subject_lookup, validate_record)
+from proctoring_events import (WriterEventSink, make_event, fetch_timeline, count_by_type,
+                               parse_cursor, DEFAULT_PAGE_SIZE)
+from detection_rules import DetectionRules, object_status as object_status_for
+from proctor_stream import TransportStats, serve_proctor_stream
+from risk_engine import RiskEngine
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "exam_system.db")
 
-try:
-    import torch
-    model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-except:
-    model = None
+# Frames from concurrent sessions are batched into one forward pass
+BATCH_MAX_SIZE = 8
+BATCH_MAX_WAIT_MS = 20
+
+# Published by a single assignment once fully built, so a request sees None or a complete pair
+Detection = namedtuple("Detection", ["scheduler", "rules"])
+detection = None
+
+def start_detection(model):
+    # Runs on the loader thread once the model is warm
+    global detection
+    detection = Detection(BatchInferenceScheduler(model, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS),
+                          DetectionRules(model.names))
+
+def start_pool_detection(pool):
+    # Runs on the pool's collector thread once the first worker has its model; the pool is the scheduler
+    global detection
+    detection = Detection(pool, DetectionRules(pool.names))
+
+# YOLOv5 loads from local files in the background; every other route serves immediately.
+# Backend: "torch" (eager hub model), "onnx" or "onnx-int8" (see inference_backend.py)
+INFERENCE_BACKEND = "torch"
+INFERENCE_THREADS = None
+# > 0: YOLO and FaceMesh run in this many worker processes fed through shared memory (inference_pool.py)
+INFERENCE_WORKERS = 0
+
+# Inference workers are spawned processes; under `python app.py` each one re-imports this module as
+# __mp_main__, so everything below that starts threads, pools or touches the database is server-only
+SERVER_PROCESS = multiprocessing.parent_process() is None
+
+if not SERVER_PROCESS:
+    detector = None
+elif not INFERENCE_WORKERS:
+    detector = ModelManager(lambda: load_backend(INFERENCE_BACKEND, INFERENCE_THREADS),
+                            on_ready=start_detection)
+    detector.start()
+else:
+    detector = InferencePool(INFERENCE_BACKEND, INFERENCE_WORKERS, INFERENCE_THREADS or 1,
+                             on_ready=start_pool_detection)
+    atexit.register(detector.close)
+
+# The pool's queue is bounded by its frame slots, so load is measured against that capacity
+capture_policy = CapturePolicy(batch_size=BATCH_MAX_SIZE,
+                               capacity=detector.slots if INFERENCE_WORKERS and detector is not None else None)
+# Violation counts, tab switches and the termination decision live here, not in the browser.
+# They are kept per exam sitting (one login's exam_session), so a termination ends that sitting only.
+# It is logged as a "terminated" event with the sitting's session_id, so it survives restarts too.
+def risk_key(user_id, exam_session):
+    return f"{user_id}/{exam_session}"
+
+def record_termination(key, risk):
+    user_id, exam_session = key.split("/", 1)
+    timestamp = time.strftime('%H:%M:%S')
+    event_writer.log(user_id, f"[{timestamp}] Exam terminated: {risk.reason}",
+                     make_event(user_id, exam_session, "terminated"))
+
+risk_engine = RiskEngine(on_terminate=record_termination)
+
+def exam_terminated(user_id, exam_session):
+    """The final risk of a terminated exam sitting, or None; falls back to the event log after a restart."""
+    key = risk_key(user_id, exam_session)
+    ended = risk_engine.terminated(key)
+    if ended is None and exam_session is not None:
+        conn = get_db_connection()
+        logged = conn.execute(
+            "SELECT 1 FROM proctoring_events WHERE user_id=? AND session_id=? AND event_type='terminated' LIMIT 1",
+            (user_id, exam_session)
+        ).fetchone()
+        conn.close()
+        if logged:
+            risk_engine.mark_terminated(key, "an earlier termination")
+            ended = risk_engine.terminated(key)
+    return ended
+frame_gate = FrameChangeGate()
 
 app = Flask(__name__)
 app.secret_key = "your_secret_key_here"
 
-os.makedirs("reports", exist_ok=True)
-os.makedirs("certificates", exist_ok=True)
+# WebSocket proctoring stream is optional (pip install flask-sock); HTTP routes always work
+sock = Sock(app) if Sock is not None else None
+http_stats = TransportStats()
+stream_stats = TransportStats()
+
+# bcrypt runs on its own bounded pool so a login storm can't starve detection requests.
+# Raising PASSWORD_HASH_ROUNDS upgrades existing hashes as users log in.
+PASSWORD_HASH_ROUNDS = 12
+PASSWORD_HASH_WORKERS = 2
+
+if SERVER_PROCESS:
+    os.makedirs("reports", exist_ok=True)
+    password_hasher = PasswordHasher(PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS)
+    # Rendered certificates: in-memory LRU in front of certificates/<key>.pdf
+    certificate_cache = CertificateCache("certificates")
+else:
+    password_hasher = certificate_cache = None
 
 
 # ================= PERFORMANCE INSIGHTS =================
@@ -42,8 +150,7 @@ def calculate_performance_insights(answers, questions, cheating_count=0):
 
         subject_stats[subject]["total"] += 1
 
-        selected = answers.get(f"q{q['id']}")
-        if selected and int(selected) == int(q["correct_answer"]):
+        if parse_choice(answers.get(f"q{q['id']}")) == int(q["correct_answer"]):
             subject_stats[subject]["correct"] += 1
 
     insights = []
@@ -73,11 +180,35 @@ def calculate_performance_insights(answers, questions, cheating_count=0):
     return insights, tips
 
 # ---------------- DB ----------------
+if SERVER_PROCESS:
+    # Bring the schema (tables and hot-path indexes) up to date before anything opens the database
+    apply_migrations(DB_PATH)
+
+    # Reads borrow a pooled WAL connection; every write goes through the single group-committing writer
+    db_pool = ConnectionPool(DB_PATH, size=16)
+    db_writer = DatabaseWriter(DB_PATH)
+    atexit.register(db_writer.close)
+
+    # Report lines and proctoring_events rows are written by a background thread, never inside a request.
+    # Created after db_writer so that at exit it flushes first (atexit runs in reverse order).
+    event_writer = EventWriter("reports", sink=WriterEventSink(db_writer))
+
+    # Subjects and question lists only change through /admin, so they are cached in-process
+    question_bank = QuestionBank(db_pool.acquire)
+else:
+    db_pool = db_writer = event_writer = question_bank = None
+
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = db_pool.acquire()
+    g.setdefault("db_connections", []).append(conn)
     return conn
 
+@app.teardown_appcontext
+def release_db_connections(exc):
+    # Hands back any connection a route didn't close, e.g. after an exception
+    for conn in g.pop("db_connections", []):
+        conn.close()
+
 # ---------------- HOME ----------------
 @app.route("/")
 def home():
@@ -88,20 +219,19 @@ def home():
 def register():
     if request.method == "POST":
         username = request.form["username"]
-        password = bcrypt.hashpw(request.form["password"].encode(), bcrypt.gensalt())
         role = request.form.get("role", "student")
+        try:
+            password = password_hasher.hash(request.form["password"].encode())
+        except (HasherBusy, FutureTimeout):
+            return "Server busy, please try again", 503
 
-        conn = get_db_connection()
         try:
-            conn.execute(
+            db_writer.execute(
                 "INSERT INTO users (username, password, role) VALUES (?,?,?)",
                 (username, password, role)
             )
-            conn.commit()
-        except:
+        except sqlite3.IntegrityError:
             return "Username exists"
-        finally:
-            conn.close()
         return redirect("/login")
 
     return render_template("register.html")
@@ -119,23 +249,28 @@ def login():
         ).fetchone()
         conn.close()
 
-        if user and bcrypt.checkpw(password, user["password"]):
+        try:
+            ok, new_hash = password_hasher.verify(password, user["password"]) if user else (False, None)
+        except (HasherBusy, FutureTimeout):
+            return "Server busy, please try again", 503
+
+        if new_hash is not None:
+            # Work factor changed since this hash was made; upgrade it without waiting for the commit
+            db_writer.submit("UPDATE users SET password=? WHERE id=?", (new_hash, user["id"]))
+
+        if ok:
             session.clear()
             session["user_id"] = user["id"]
             session["username"] = user["username"]
             session["role"] = user["role"]
+            # Groups this login's proctoring events in the proctoring_events table
+            session["exam_session"] = uuid.uuid4().hex[:12]
 
             if user["role"] == "admin":
                 return redirect("/admin")
 
             # ================= MULTI SUBJECT FIX =================
-            conn = get_db_connection()
-            subjects = conn.execute(
-                "SELECT id FROM subjects ORDER BY id"
-            ).fetchall()
-            conn.close()
-
-            session["subject_queue"] = [s["id"] for s in subjects]
+            session["subject_queue"] = question_bank.subject_ids()
             session["completed_subjects"] = []
             # =====================================================
 
@@ -151,33 +286,61 @@ def admin():
     if session.get("role") != "admin":
         return redirect("/")
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    subjects = cur.execute("SELECT * FROM subjects").fetchall()
+    subjects = question_bank.subjects()
 
     if request.method == "POST":
-        cur.execute("""
-            INSERT INTO questions
-            (subject_id, question, option1, option2, option3, option4, correct_answer)
-            VALUES (?,?,?,?,?,?,?)
-        """, (
-            request.form["subject_id"],
-            request.form["question"],
-            request.form["option1"],
-            request.form["option2"],
-            request.form["option3"],
-            request.form["option4"],
-            int(request.form["correct_answer"])
-        ))
-        conn.commit()
+        # Same checks as an imported row; a bad field is reported on the dashboard instead of a 500
+        try:
+            row = validate_record(request.form, subject_lookup(subjects))
+        except ValueError as err:
+            flash(f"Question not added: {err}")
+            return redirect(url_for("admin"))
+        subject_id = row[0]
+        db_writer.execute(INSERT_QUESTION, row)
+        question_bank.invalidate(subject_id)
+        # Redirect instead of re-rendering, so a refresh doesn't re-submit the form
+        return redirect(url_for("admin", subject_id=subject_id))
+
+    subject_filter = parse_page_id(request.args.get("subject_id"))
+    before_id = parse_page_id(request.args.get("before"))
 
-    questions = cur.execute("SELECT * FROM questions").fetchall()
+    conn = get_db_connection()
+    questions, next_before = fetch_question_page(conn, subject_filter, before_id)
     conn.close()
 
     return render_template("admin_dashboard.html",
                            questions=questions,
-                           subjects=subjects)
+                           subjects=subjects,
+                           subject_names={s["id"]: s["name"] for s in subjects},
+                           subject_filter=subject_filter,
+                           next_before=next_before,
+                           paged=before_id is not None)
+
+@app.route("/admin/import", methods=["POST"])
+def admin_import():
+    if session.get("role") != "admin":
+        return redirect("/")
+
+    upload = request.files.get("file")
+    fmt = request.form.get("format") or detect_format(upload.filename if upload else None)
+    if upload is None or fmt not in IMPORT_FORMATS:
+        return jsonify({"error": "Upload a .csv or .jsonl file"}), 400
+
+    # Werkzeug spools large uploads to disk; rows are decoded and inserted a chunk at a time
+    try:
+        report = import_questions(
+            open_text(upload.stream), fmt, question_bank.subjects(),
+            lambda rows: db_writer.executemany(INSERT_QUESTION, rows)
+        )
+    except UnicodeDecodeError:
+        # Chunks read before the bad bytes are already committed, for subjects we no longer know
+        question_bank.invalidate()
+        return jsonify({"error": "File is not UTF-8 text; rows before the first undecodable "
+                                 "line may have been imported"}), 400
+    for subject_id in report["subject_ids"]:
+        question_bank.invalidate(subject_id)
+
+    return jsonify(report)
 
 # ---------------- EXAM ----------------
 @app.route("/exam/<int:subject_id>")
@@ -185,20 +348,17 @@ def exam(subject_id):
     if "user_id" not in session:
         return redirect("/login")
 
+    ended = exam_terminated(session["user_id"], session.get("exam_session"))
+    if ended is not None:
+        return f"Exam terminated due to {ended.reason}", 403
+
     if subject_id not in session.get("subject_queue", []):
        # ALL SUBJECTS COMPLETED
        return redirect("/result")
 
-    conn = get_db_connection()
-    questions = conn.execute(
-        "SELECT * FROM questions WHERE subject_id=?",
-        (subject_id,)
-    ).fetchall()
-    subject = conn.execute(
-        "SELECT * FROM subjects WHERE id=?",
-        (subject_id,)
-    ).fetchone()
-    conn.close()
+    # Served from the in-memory bank; a cohort starting together doesn't each hit SQLite
+    questions = question_bank.questions(subject_id).questions
+    subject = question_bank.subject(subject_id)
 
     return render_template(
         "exam.html",
@@ -214,30 +374,21 @@ def submit_exam(subject_id):
     if "user_id" not in session:
         return redirect("/login")
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    questions = cur.execute("""
-    SELECT q.*, s.name AS subject_name
-    FROM questions q
-    JOIN subjects s ON q.subject_id = s.id
-    WHERE q.subject_id=?
-""", (subject_id,)).fetchall()
+    ended = exam_terminated(session["user_id"], session.get("exam_session"))
+    if ended is not None:
+        return f"Exam terminated due to {ended.reason}", 403
 
+    bank_entry = question_bank.questions(subject_id)
+    questions = bank_entry.questions
 
-    # 2️⃣ Calculate SCORE
-    score = 0
-    for q in questions:
-        selected = request.form.get(f"q{q['id']}")
-        if selected and int(selected) == int(q["correct_answer"]):
-            score += 1
+    # 2️⃣ Calculate SCORE (against the cached answer key)
+    score, total_questions = grade(bank_entry, request.form)
 
     # 3️⃣ TOTAL & PERCENTAGE
-    total_questions = len(questions)
     percentage = round((score / total_questions) * 100, 2) if total_questions else 0
 
     # 4️⃣ SAVE RESULT
-    cur.execute("""
+    db_writer.execute("""
         INSERT INTO exam_results (user_id, subject_id, score, total, time_taken)
         VALUES (?, ?, ?, ?, ?)
     """, (
@@ -248,9 +399,6 @@ def submit_exam(subject_id):
         "15 mins"
     ))
 
-    conn.commit()
-    conn.close()
-
     # ✅ 5️⃣ PERFORMANCE INSIGHTS
     insights, tips = calculate_performance_insights(
         request.form,
@@ -341,8 +489,10 @@ def result():
         (session["user_id"],)
     ).fetchone()
 
+    conn.close()
+
     if not existing:
-        conn.execute("""
+        db_writer.execute("""
             INSERT INTO results (user_id, score, total, percentage, certificate_type, created_at)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (
@@ -353,9 +503,6 @@ def result():
             certificate_type,
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ))
-        conn.commit()
-
-    conn.close()
 
     return render_template(
         "result.html",
@@ -371,15 +518,19 @@ def result():
 # ---------------- LOGOUT ----------------
 @app.route("/logout")
 def logout():
+    # Per-session detection state is keyed by the user id string exam.html sends
+    user_id = str(session.get("user_id"))
+    if INFERENCE_WORKERS:
+        detector.close_session(user_id)
+    else:
+        face_mesh_engine.close_session(user_id)
+    frame_gate.forget(user_id)
+    risk_engine.forget(risk_key(user_id, session.get("exam_session")))
     session.clear()
     return redirect("/")
 
 # ---------------- Cheating Detection ----------------
-@app.route("/detect_cheating", methods=["POST"])
-def detect_cheating():
-    data = request.get_json()
-    user_id = data.get("user_id", "unknown")
-
+def run_detection(frame, user_id, exam_session=None):
     # DEFAULT VALUES
     cheating = "No"
     blink = "No"
@@ -388,49 +539,91 @@ def detect_cheating():
     emotion = "Neutral"
     emotion_conf = 0
     object_status = "Normal"
+    object_label, object_conf = None, None
     audio_status = "Normal"
+    cached = False
 
-    try:
-        if model is None:
-            raise Exception("YOLO model not loaded")
+    # A terminated exam gets no more analysis; the client is told again to stop
+    key = risk_key(user_id, exam_session)
+    ended = risk_engine.terminated(key)
+    if ended is not None:
+        return {"status": "terminated", "skipped": True, **risk_fields(ended)}
 
-        img_data = data["image"].split(",")[1]
-        frame = cv2.imdecode(
-            np.frombuffer(base64.b64decode(img_data), np.uint8),
-            cv2.IMREAD_COLOR
-        )
+    ready = detection
+    try:
+        if ready is None:
+            raise Exception(f"YOLO model not ready ({detector.state})")
+        scheduler, rules = ready
 
         if frame is None:
-            raise Exception("Empty frame")
-
-        # ✅ YOLO
-        results = model(frame)
-        detections = results.pandas().xyxy[0]
-
-        for _, row in detections.iterrows():
-            if row["name"] not in ["person"] and row["confidence"] > 0.20:
+            raise InvalidFrame("Empty or undecodable frame")
+
+        # ✅ GATE: a frame that barely differs from the last analyzed one reuses its verdict
+        thumb, cached_verdict = frame_gate.lookup(user_id, frame)
+        if cached_verdict is not None:
+            (cheating, object_status, object_label, object_conf,
+             blink, mouth, head_pose, emotion, emotion_conf) = cached_verdict
+            cached = True
+        else:
+            # ✅ YOLO (and FaceMesh, when they run in the inference worker processes)
+            if INFERENCE_WORKERS:
+                detections, face = scheduler.infer(frame, session_id=user_id)
+            else:
+                detections, face = scheduler.infer(frame), None
+            verdict = rules.evaluate(detections)
+            if verdict.cheating:
                 cheating = "Yes"
-                object_status = f"{row['name']} detected"
-                break
-
-        # TEMP LOGIC
-        blink = "Yes" if int(time.time()) % 2 == 0 else "No"
-        mouth = "Open" if int(time.time()) % 3 == 0 else "Closed"
-        head_pose = ["Left","Right","Up","Down","Center"][int(time.time()) % 5]
-
-        e = detect_emotion(frame)
-        if e:
-            emotion, emotion_conf = e
-
+                object_status = object_status_for(verdict)
+                object_label, object_conf = verdict.label, round(verdict.confidence, 3)
+
+            # ✅ FACE: one FaceMesh pass gives blink, mouth, head pose and emotion
+            if face is None:
+                face = analyze_frame(frame, session_id=user_id)
+            blink = face["blink"]
+            mouth = face["mouth"]
+            head_pose = face["head_pose"]
+            emotion, emotion_conf = face["emotion"], face["emotion_conf"]
+
+            frame_gate.store(user_id, thumb, (cheating, object_status, object_label, object_conf,
+                                              blink, mouth, head_pose, emotion, emotion_conf))
+
+    except (PoolBusy, WorkerCrashed) as err:
+        # No verdict for this frame: it is neither logged nor scored, and the client backs off
+        return {
+            "status": "busy",
+            "skipped": True,
+            "reason": str(err),
+            **risk_fields(risk_engine.risk(key)),
+            "capture": capture_policy.directive(0, busy=True)
+        }
+    except InvalidFrame as err:
+        # A frame that can't be analyzed is not a clean one: skip it the same way, without backing off
+        risk = risk_engine.risk(key)
+        return {
+            "status": "invalid",
+            "skipped": True,
+            "reason": str(err),
+            **risk_fields(risk),
+            "capture": capture_policy.directive(0, risk.score)
+        }
     except Exception as err:
         print("DETECTION ERROR:", err)
 
-    # LOG
+    # LOG (queued; the event writer appends to the report file in the background)
     timestamp = time.strftime('%H:%M:%S')
-    with open(f"reports/user_{user_id}_report.txt", "a") as f:
-        f.write(f"[{timestamp}] Cheating: {cheating}, Object: {object_status}\n")
+    event_writer.log(
+        user_id,
+        f"[{timestamp}] Cheating: {cheating}, Object: {object_status}",
+        make_event(user_id, exam_session, "object" if cheating == "Yes" else "clean",
+                   object_label, object_conf, emotion)
+    )
 
-    return jsonify({
+    risk = risk_engine.record_frame(key, cheating == "Yes", object_label, emotion)
+
+    # Tell the client how to capture its next frame, based on server load and this session's risk
+    queue_depth = ready.scheduler.queue_depth() if ready is not None else 0
+
+    return {
         "cheating": cheating,
         "blink": blink,
         "mouth": mouth,
@@ -438,7 +631,104 @@ def detect_cheating():
         "emotion": emotion,
         "emotion_conf": emotion_conf,
         "object": object_status,
-        "audio": audio_status
+        "audio": audio_status,
+        "cached": cached,
+        **risk_fields(risk),
+        "capture": capture_policy.directive(queue_depth, risk.score)
+    }
+
+def risk_fields(risk):
+    return {
+        "risk": round(risk.score, 3),
+        "violations": risk.violations,
+        "tab_switches": risk.tab_switches,
+        "terminate": risk.terminate,
+        "terminate_reason": risk.reason
+    }
+
+def detection_response(frame, user_id, cpu_start):
+    response = jsonify(run_detection(frame, user_id, session.get("exam_session")))
+    http_stats.record(user_id, request.content_length or 0,
+                      response.calculate_content_length() or 0,
+                      time.thread_time() - cpu_start)
+    return response
+
+# JSON body with a base64 data URL (kept for older clients)
+@app.route("/detect_cheating", methods=["POST"])
+def detect_cheating():
+    cpu_start = time.thread_time()
+    if "user_id" not in session:
+        return jsonify({"status": "error"}), 401
+    # Verdicts count towards termination, so they are always scored against the logged-in user
+    user_id = str(session["user_id"])
+    data = request.get_json()
+    frame = decode_data_url(data.get("image"))
+    return detection_response(frame, user_id, cpu_start)
+
+# Raw JPEG bytes, either as the request body (Content-Type: image/jpeg) or as a multipart "frame" file
+@app.route("/detect_cheating_frame", methods=["POST"])
+def detect_cheating_frame():
+    cpu_start = time.thread_time()
+    if "user_id" not in session:
+        return jsonify({"status": "error"}), 401
+    user_id = str(session["user_id"])
+
+    upload = request.files.get("frame")
+    if upload is not None:
+        buf = upload.read()
+    else:
+        buf = request.get_data(cache=False)
+
+    frame = decode_jpeg(buf)
+    return detection_response(frame, user_id, cpu_start)
+
+# ---------------- Proctoring Stream ----------------
+# One WebSocket per exam session: binary JPEG frames and JSON events in, JSON verdicts out
+if sock is not None:
+    @sock.route("/ws/proctor")
+    def proctor_stream(ws):
+        if "user_id" not in session:
+            return
+        user_id = str(session["user_id"])
+        exam_session = session.get("exam_session")
+
+        serve_proctor_stream(
+            ws,
+            user_id,
+            handle_frame=lambda buf: run_detection(decode_jpeg(buf), user_id, exam_session),
+            handle_event=lambda incident_type: risk_fields(log_incident(user_id, incident_type, exam_session)),
+            stats=stream_stats,
+            closed_errors=(ConnectionClosed,)
+        )
+
+@app.route("/health")
+def health():
+    # Liveness: the web app is up, whatever the model is doing
+    return jsonify({"status": "ok", "model": detector.health()})
+
+@app.route("/ready")
+def ready():
+    # Readiness: 503 until detection can actually run
+    return jsonify(detector.health()), 200 if detector.is_ready() else 503
+
+@app.route("/transport_stats")
+def transport_stats():
+    return jsonify({
+        "websocket_enabled": sock is not None,
+        "http": http_stats.snapshot(),
+        "websocket": stream_stats.snapshot()
+    })
+
+# ---------------- Detection Stats ----------------
+@app.route("/detection_stats")
+def detection_stats():
+    ready = detection
+    return jsonify({
+        "scheduler": ready.scheduler.stats() if ready is not None else "model not loaded",
+        "frame_gate": frame_gate.stats(),
+        "event_log": event_writer.stats(),
+        "password_hasher": password_hasher.stats(),
+        "risk_engine": risk_engine.stats()
     })
 
 # ---------------- Cheating Log ----------------
@@ -449,85 +739,60 @@ def log_cheating():
 
     data = request.get_json()
     incident_type = data.get("type", "Unknown")
-    user_id = data.get("user_id", session["user_id"])
+    user_id = session["user_id"]
 
-    timestamp = time.strftime('%H:%M:%S')
-    report_path = os.path.join("reports", f"user_{user_id}_report.txt")
+    risk = log_incident(user_id, incident_type, session.get("exam_session"))
+    return jsonify({"status": "success", **risk_fields(risk)})
 
-    with open(report_path, "a") as f:
-        f.write(f"[{timestamp}] Cheating Detected: {incident_type}\n")
+def log_incident(user_id, incident_type, exam_session=None):
+    timestamp = time.strftime('%H:%M:%S')
+    # "Tab Switch" -> "tab_switch"
+    event_type = incident_type.strip().lower().replace(" ", "_") or "unknown"
+    if event_type == "terminated":
+        # Reserved for record_termination; a client can't end (or ban) an exam by naming it
+        event_type = "unknown"
+    event_writer.log(
+        user_id,
+        f"[{timestamp}] Cheating Detected: {incident_type}",
+        make_event(user_id, exam_session, event_type)
+    )
+    key = risk_key(user_id, exam_session)
+    if event_type == "tab_switch":
+        return risk_engine.record_tab_switch(key)
+    return risk_engine.risk(key)
 
-    return jsonify({"status": "success"})
-# ---------------- Certificate Helpers ----------------
-def clamp_percentage(raw):
-    try:
-        pct = float(raw)
-    except Exception:
-        pct = 0.0
-    return max(0, min(100, round(pct, 2)))
-
-def draw_certificate_pdf(buffer, username, pct, template='excellent'):
-    c = canvas.Canvas(buffer, pagesize=landscape(A4))
-    width, height = landscape(A4)
-    margin = 2*cm
-
-    if template == 'excellent':
-        border = (0.06, 0.45, 0.14)
-        subtitle = "Outstanding Achievement"
-    elif template == 'good':
-        border = (0.85, 0.45, 0.08)
-        subtitle = "Certificate of Merit"
-    else:
-        border = (0.6, 0.08, 0.15)
-        subtitle = "Certificate of Participation"
-
-    c.setStrokeColorRGB(*border)
-    c.setLineWidth(4)
-    c.rect(margin/2, margin/2, width - margin, height - margin)
-
-    c.setFillColorRGB(*border)
-    c.setFont("Helvetica-Bold", 34)
-    c.drawCentredString(width/2, height - 3*cm, subtitle)
-
-    c.setFillColorRGB(0,0,0)
-    c.setFont("Helvetica", 14)
-    c.drawCentredString(width/2, height - 4.5*cm, "This certifies that")
-
-    c.setFillColorRGB(*border)
-    c.setFont("Helvetica-Bold", 28)
-    c.drawCentredString(width/2, height - 6.5*cm, username)
-
-    c.setFillColorRGB(0,0,0)
-    c.setFont("Helvetica", 14)
-    c.drawCentredString(width/2, height - 8.2*cm,
-                        f"has completed the online exam with a score of {pct:.2f}%.")
-
-    if pct >= 90:
-        grade = "Distinction"
-    elif pct >= 70:
-        grade = "Excellent"
-    elif pct >= 50:
-        grade = "Good"
-    else:
-        grade = "Needs Improvement"
+# ---------------- Proctoring Timeline ----------------
+def can_view_events(user_id):
+    return session.get("role") == "admin" or session.get("user_id") == user_id
 
-    c.setFont("Helvetica-Bold", 18)
-    c.drawCentredString(width/2, height - 9.5*cm, f"Grade: {grade}")
+# Newest first, keyset-paged: pass next_cursor back as ?cursor= for the next page
+@app.route("/proctoring_events/<int:user_id>")
+def proctoring_timeline(user_id):
+    if not can_view_events(user_id):
+        return jsonify({"status": "error"}), 403
 
-    c.setFont("Helvetica", 12)
-    c.drawCentredString(width/2, height - 11*cm, f"Date: {datetime.now().strftime('%d %B %Y')}")
+    conn = get_db_connection()
+    events, next_cursor = fetch_timeline(
+        conn,
+        user_id,
+        cursor=parse_cursor(request.args.get("cursor")),
+        limit=request.args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+        event_type=request.args.get("type")
+    )
+    conn.close()
 
-    sig_y = 3.5*cm
-    c.drawString(100, sig_y + 20, "Examiner")
-    c.line(100, sig_y + 15, 260, sig_y + 15)
+    return jsonify({"events": events, "next_cursor": next_cursor})
 
-    c.drawString(width - 260, sig_y + 20, "Authorized Signatory")
-    c.line(width - 260, sig_y + 15, width - 80, sig_y + 15)
+@app.route("/proctoring_events/<int:user_id>/counts")
+def proctoring_counts(user_id):
+    if not can_view_events(user_id):
+        return jsonify({"status": "error"}), 403
 
-    c.showPage()
-    c.save()
-    buffer.seek(0)
+    conn = get_db_connection()
+    counts = count_by_type(conn, user_id, since=request.args.get("since", type=float))
+    conn.close()
 
+    return jsonify({"user_id": user_id, "counts": counts})
 # ---------------- Certificate Download ----------------
 @app.route("/download_certificate")
 def download_certificate():
@@ -535,37 +800,40 @@ def download_certificate():
         return redirect("/login")
 
     username = session.get("username", "Student")
-    raw_score = request.args.get("score")
 
-    if raw_score is None:
-        try:
-            conn = get_db_connection()
-            row = conn.execute(
-                "SELECT percentage FROM results WHERE user_id = ? ORDER BY id DESC LIMIT 1",
-                (session["user_id"],)
-            ).fetchone()
-            conn.close()
-            raw_score = row["percentage"] if row else 0
-        except:
-            raw_score = 0
+    # Always the stored result: a client-chosen ?score= would let one user fill the disk tier
+    # with a certificate per distinct value (and print whatever score they liked)
+    try:
+        conn = get_db_connection()
+        row = conn.execute(
+            "SELECT percentage FROM results WHERE user_id = ? ORDER BY id DESC LIMIT 1",
+            (session["user_id"],)
+        ).fetchone()
+        conn.close()
+        raw_score = row["percentage"] if row else 0
+    except:
+        raw_score = 0
 
     pct = clamp_percentage(raw_score)
+    template = template_for(pct)
+    date = today()
 
-    if pct >= 70:
-        template = "excellent"
-    elif pct >= 50:
-        template = "good"
+    # The key only depends on the inputs, so a repeat download is answered before rendering anything
+    key = certificate_key(username, pct, template, date)
+    if request.if_none_match.contains(key):
+        response = app.response_class(status=304)
     else:
-        template = "improvement"
-
-    buffer = BytesIO()
-    draw_certificate_pdf(buffer, username, pct, template)
-
-    filename = f"{username}_certificate_{int(pct)}.pdf"
-    try:
-        return send_file(buffer, as_attachment=True, download_name=filename, mimetype="application/pdf")
-    except TypeError:
-        return send_file(buffer, as_attachment=True, attachment_filename=filename, mimetype="application/pdf")
+        key, pdf = certificate_cache.get(username, pct, template, date)
+        filename = f"{username}_certificate_{int(pct)}.pdf"
+        try:
+            response = send_file(BytesIO(pdf), as_attachment=True, download_name=filename, mimetype="application/pdf")
+        except TypeError:
+            response = send_file(BytesIO(pdf), as_attachment=True, attachment_filename=filename, mimetype="application/pdf")
+
+    response.set_etag(key)
+    # Revalidate every time: the certificate changes with the score and the date
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 # ---------------- RUN ----------------
 if __name__ == "__main__":
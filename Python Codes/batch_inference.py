@@ -0,0 +1,148 @@
+# batch_inference.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+def split_results(results, count):
+    """
+    Split the output of one batched forward pass into per-frame results.
+    YOLOv5 Detections carry one raw xyxy tensor per image; plain models
+    return a list.
+    """
+    if hasattr(results, "xyxy"):
+        outputs = list(results.xyxy)
+    else:
+        outputs = list(results)
+
+    if len(outputs) != count:
+        raise RuntimeError(f"Model returned {len(outputs)} results for {count} frames")
+    return outputs
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class BatchInferenceScheduler:
+    """
+    Gathers frames from concurrent requests into micro-batches.
+    A batch is dispatched when it holds max_batch_size frames or when the
+    oldest frame has waited max_wait_ms, whichever happens first.
+    """
+
+    def __init__(self, model, max_batch_size=8, max_wait_ms=20, stats_window=1000):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+        self._frames = 0
+        self._batches = 0
+        self._errors = 0
+        self._started = time.perf_counter()
+
+        self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+        self._thread.start()
+
+    # ---------------- PUBLIC API ----------------
+    def submit(self, frame):
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Inference scheduler is closed")
+            self._pending.append((frame, time.perf_counter(), future))
+            self._cond.notify()
+        return future
+
+    def infer(self, frame, timeout=10):
+        return self.submit(frame).result(timeout=timeout)
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            sizes = list(self._batch_sizes)
+            waits = list(self._queue_waits)
+            frames, batches, errors = self._frames, self._batches, self._errors
+        elapsed = time.perf_counter() - self._started
+
+        return {
+            "frames": frames,
+            "batches": batches,
+            "errors": errors,
+            "queue_depth": self.queue_depth(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "frames_per_sec": round(frames / elapsed, 2) if elapsed else 0.0,
+            "batch_size_avg": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "batch_size_max": max(sizes) if sizes else 0,
+            "queue_wait_ms_p50": round(percentile(waits, 50) * 1000, 2),
+            "queue_wait_ms_p99": round(percentile(waits, 99) * 1000, 2),
+        }
+
+    # ---------------- WORKER ----------------
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+
+            if not self._pending:
+                return None
+
+            # Hold the batch open until it is full or the oldest frame's deadline passes
+            deadline = self._pending[0][1] + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            dispatched = time.perf_counter()
+            frames = [item[0] for item in batch]
+
+            try:
+                outputs = split_results(self.model(frames), len(frames))
+            except Exception as err:
+                with self._stats_lock:
+                    self._errors += 1
+                for _, _, future in batch:
+                    future.set_exception(err)
+                continue
+
+            with self._stats_lock:
+                self._frames += len(batch)
+                self._batches += 1
+                self._batch_sizes.append(len(batch))
+                self._queue_waits.extend(dispatched - queued for _, queued, _ in batch)
+
+            for (_, _, future), output in zip(batch, outputs):
+                future.set_result(output)
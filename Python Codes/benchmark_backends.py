@@ -0,0 +1,184 @@
+# benchmark_backends.py
+"""
+Latency, memory and accuracy of the inference backends on Dataset/ images.
+
+Each backend runs in its own subprocess so peak RSS is measured per
+backend. Accuracy is measured against eager PyTorch: boxes of the same
+class with IoU >= 0.5 count as matches (precision/recall versus torch),
+and "verdict agreement" is how often DetectionRules reaches the same
+cheating/no-cheating decision.
+
+    python benchmark_backends.py --images 200
+    python benchmark_backends.py --backends torch,onnx,onnx-int8 --threads 4
+    python benchmark_backends.py --dataset-cache dataset_cache/test
+
+With --dataset-cache the frames are pre-decoded, letterboxed rows read
+from a dataset_cache.py memmap instead of JPEGs decoded per run.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from batch_inference import percentile
+from dataset_cache import DatasetCache
+from detection_rules import DetectionRules
+from inference_backend import load_backend
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, "..", "Dataset")
+
+
+def dataset_images(root, limit):
+    paths = sorted(p for p in glob.glob(os.path.join(root, "**", "*.*"), recursive=True)
+                   if p.lower().endswith((".jpg", ".jpeg", ".png")))
+    return paths[:limit]
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+# ---------------- WORKER (one backend per process) ----------------
+def load_frames(args):
+    if args.dataset_cache:
+        data = DatasetCache(args.dataset_cache)
+        frames = [data.images[i] for i in np.flatnonzero(data.ok)[:args.images]]
+        # Fault the mapped pages in now, so they count in the baseline RSS rather than in model MB
+        for frame in frames:
+            frame.max()
+        return frames
+    return [f for f in (cv2.imread(p) for p in dataset_images(args.dataset, args.images)) if f is not None]
+
+
+def run_worker(args):
+    frames = load_frames(args)
+    base_mb = rss_mb()
+
+    started = time.perf_counter()
+    backend = load_backend(args.worker, args.threads)
+    load_s = time.perf_counter() - started
+    for _ in range(3):
+        backend(frames[0])
+
+    latencies, detections = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        det = backend(frame).xyxy[0]
+        latencies.append(time.perf_counter() - t0)
+        detections.append(np.asarray(det, dtype=np.float32).tolist())
+
+    t0 = time.perf_counter()
+    for i in range(0, len(frames), args.batch):
+        backend(frames[i:i + args.batch])
+    batch_fps = len(frames) / (time.perf_counter() - t0)
+
+    names = backend.names
+    json.dump({
+        "info": backend.info(),
+        "names": {int(k): v for k, v in names.items()} if isinstance(names, dict) else dict(enumerate(names)),
+        "load_s": load_s,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "batch_fps": batch_fps,
+        "model_mb": rss_mb() - base_mb,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "detections": detections,
+    }, sys.stdout)
+
+
+# ---------------- ACCURACY ----------------
+def iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def compare(reference, candidate, rules, iou_threshold=0.5):
+    matched = ref_total = cand_total = agree = 0
+    for ref, cand in zip(reference, candidate):
+        ref = np.asarray(ref, dtype=np.float32).reshape(-1, 6)
+        cand = np.asarray(cand, dtype=np.float32).reshape(-1, 6)
+        ref_total += len(ref)
+        cand_total += len(cand)
+        agree += rules.evaluate(ref).cheating == rules.evaluate(cand).cheating
+
+        if len(ref) and len(cand):
+            iou = iou_matrix(ref[:, :4], cand[:, :4])
+            iou[ref[:, 5][:, None] != cand[:, 5][None, :]] = 0
+            used = set()
+            for i in np.argsort(-ref[:, 4]):
+                j = int(iou[i].argmax())
+                if iou[i, j] >= iou_threshold and j not in used:
+                    used.add(j)
+                    matched += 1
+
+    return {
+        "precision": matched / cand_total if cand_total else 1.0,
+        "recall": matched / ref_total if ref_total else 1.0,
+        "agreement": agree / len(reference) if reference else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--dataset-cache", default=None, help="dataset_cache.py directory to read frames from")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {}
+    for name in args.backends.split(","):
+        cmd = [sys.executable, __file__, "--worker", name, "--dataset", args.dataset,
+               "--images", str(args.images), "--batch", str(args.batch)]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        if args.dataset_cache:
+            cmd += ["--dataset-cache", args.dataset_cache]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    if not results:
+        return
+    print(f"\n{'backend':<11}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}{'batch fps':>11}"
+          f"{'model MB':>10}{'peak MB':>9}{'precision':>11}{'recall':>8}{'verdicts':>10}")
+
+    reference = results.get("torch")
+    names = next(iter(results.values()))["names"]
+    rules = DetectionRules({int(k): v for k, v in names.items()})
+    for name, r in results.items():
+        if reference is not None:
+            acc = compare(reference["detections"], r["detections"], rules)
+            acc_cols = f"{acc['precision']:>11.3f}{acc['recall']:>8.3f}{acc['agreement'] * 100:>9.1f}%"
+        else:
+            acc_cols = f"{'-':>11}{'-':>8}{'-':>10}"
+        print(f"{name:<11}{r['load_s']:>8.2f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['batch_fps']:>11.1f}"
+              f"{r['model_mb']:>10.0f}{r['peak_mb']:>9.0f}{acc_cols}")
+
+
+if __name__ == "__main__":
+    main()
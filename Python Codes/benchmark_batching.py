@@ -0,0 +1,99 @@
+# benchmark_batching.py
+"""
+Throughput / latency benchmark for BatchInferenceScheduler using a stub model.
+
+The stub charges a fixed per-call overhead plus a per-frame cost, which is
+roughly how a CPU YOLOv5 forward pass behaves. Each simulated session posts
+one frame every --interval seconds (open loop, like exam.html).
+
+    python benchmark_batching.py --sessions 300 --interval 3 --duration 10
+"""
+import argparse
+import random
+import threading
+import time
+
+from batch_inference import BatchInferenceScheduler, percentile
+
+
+class StubModel:
+    def __init__(self, overhead_ms=15.0, per_frame_ms=3.0):
+        self.overhead = overhead_ms / 1000.0
+        self.per_frame = per_frame_ms / 1000.0
+        self._device = threading.Lock()  # one CPU "device", calls serialize
+
+    def __call__(self, frames):
+        with self._device:
+            time.sleep(self.overhead + self.per_frame * len(frames))
+        return [("person", 0.9)] * len(frames)
+
+
+def run_load(infer, sessions, interval, duration):
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def session_loop():
+        # Spread session start times over one interval, like real students joining
+        time.sleep(random.uniform(0, interval))
+        next_send = time.perf_counter()
+        while next_send < stop_at:
+            start = time.perf_counter()
+            infer(None)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+            next_send += interval
+            time.sleep(max(0.0, next_send - time.perf_counter()))
+
+    threads = [threading.Thread(target=session_loop, daemon=True) for _ in range(sessions)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "frames": len(latencies),
+        "fps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=3.0)
+    parser.add_argument("--duration", type=float, default=6.0)
+    parser.add_argument("--overhead-ms", type=float, default=15.0)
+    parser.add_argument("--per-frame-ms", type=float, default=3.0)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--waits-ms", default="5,20,50")
+    args = parser.parse_args()
+
+    offered = args.sessions / args.interval
+    print(f"Offered load: {offered:.1f} frames/s from {args.sessions} sessions\n")
+    print(f"{'mode':<24}{'frames':>8}{'fps':>10}{'p50 ms':>10}{'p99 ms':>10}{'avg batch':>11}{'wait p99':>10}")
+
+    model = StubModel(args.overhead_ms, args.per_frame_ms)
+    direct = run_load(lambda frame: model([frame]), args.sessions, args.interval, args.duration)
+    print(f"{'per-request (no batch)':<24}{direct['frames']:>8}{direct['fps']:>10.1f}"
+          f"{direct['p50_ms']:>10.1f}{direct['p99_ms']:>10.1f}{1:>11}{'-':>10}")
+
+    for batch_size in [int(x) for x in args.batch_sizes.split(",")]:
+        for wait_ms in [float(x) for x in args.waits_ms.split(",")]:
+            scheduler = BatchInferenceScheduler(model, max_batch_size=batch_size, max_wait_ms=wait_ms)
+            result = run_load(scheduler.infer, args.sessions, args.interval, args.duration)
+            stats = scheduler.stats()
+            scheduler.close()
+
+            label = f"batch={batch_size} wait={wait_ms:g}ms"
+            print(f"{label:<24}{result['frames']:>8}{result['fps']:>10.1f}"
+                  f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                  f"{stats['batch_size_avg']:>11}{stats['queue_wait_ms_p99']:>10}")
+
+
+if __name__ == "__main__":
+    main()
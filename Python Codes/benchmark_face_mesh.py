@@ -0,0 +1,89 @@
+# benchmark_face_mesh.py
+"""
+Per-frame FaceMesh latency: a new FaceMesh per call (old detect_emotion)
+versus the persistent per-session FaceMeshEngine.
+
+    python benchmark_face_mesh.py --video clip.mp4 --frames 200
+    python benchmark_face_mesh.py --image face.jpg --frames 200
+
+With neither option the first image found under Dataset/ is repeated.
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from face_mesh_engine import DEFAULT_OPTIONS, FaceMeshEngine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, "..", "Dataset")
+
+
+def load_frames(args):
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        cap.release()
+        return frames
+
+    path = args.image
+    if path is None:
+        candidates = sorted(glob.glob(os.path.join(DATASET_DIR, "**", "*.jp*g"), recursive=True))
+        if not candidates:
+            raise SystemExit("No --image/--video given and no JPEGs under Dataset/")
+        path = candidates[0]
+
+    frame = cv2.imread(path)
+    if frame is None:
+        raise SystemExit(f"Could not read {path}")
+    return [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)] * args.frames
+
+
+def time_frames(frames, process):
+    timings = []
+    for rgb in frames:
+        start = time.perf_counter()
+        process(rgb)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def per_call(rgb):
+    with mp.solutions.face_mesh.FaceMesh(**DEFAULT_OPTIONS) as face_mesh:
+        return face_mesh.process(rgb)
+
+
+def report(name, timings):
+    print(f"{name:<22}{timings.mean():>10.2f}{np.percentile(timings, 50):>10.2f}"
+          f"{np.percentile(timings, 95):>10.2f}{1000 / timings.mean():>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image")
+    parser.add_argument("--video")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    print(f"{len(frames)} frames\n")
+    print(f"{'mode':<22}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'fps':>10}")
+
+    report("FaceMesh per call", time_frames(frames, per_call))
+
+    engine = FaceMeshEngine()
+    report("persistent engine", time_frames(frames, lambda rgb: engine.process("bench", rgb)))
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmark_frame_ingest.py
+"""
+Bytes on the wire and server CPU time per frame for the two upload routes:
+
+  json   - /detect_cheating: JSON body with a base64 data URL
+  binary - /detect_cheating_frame: raw JPEG body, full-size decode
+  reduced- /detect_cheating_frame with IMREAD_REDUCED_* picked from the header
+
+    python benchmark_frame_ingest.py --image some_frame.jpg --frames 300
+"""
+import argparse
+import base64
+import json
+import time
+
+import cv2
+import numpy as np
+
+from frame_ingest import decode_data_url, decode_jpeg
+
+
+def synthetic_frame(width, height, seed=0):
+    # Smooth gradient plus mild noise compresses roughly like a webcam frame
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    noise = rng.normal(0, 8, size=base.shape)
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def cpu_per_frame(fn, body, frames):
+    start = time.process_time()
+    for _ in range(frames):
+        fn(body)
+    return (time.process_time() - start) / frames * 1000
+
+
+def json_route(body):
+    data = json.loads(body)
+    return decode_data_url(data["image"], min_side=None)
+
+
+def binary_route(body):
+    return decode_jpeg(body, min_side=None)
+
+
+def reduced_route(body):
+    return decode_jpeg(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="JPEG/PNG to use instead of synthetic frames")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--quality", type=int, default=92, help="browser default for toDataURL")
+    args = parser.parse_args()
+
+    if args.image:
+        sources = {args.image: cv2.imread(args.image)}
+    else:
+        sources = {"640x480": synthetic_frame(640, 480), "1280x720": synthetic_frame(1280, 720)}
+
+    print(f"{'frame':<12}{'route':<9}{'bytes':>10}{'cpu ms':>9}{'decoded':>12}")
+    for name, image in sources.items():
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+        jpeg = encoded.tobytes()
+        data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+        json_body = json.dumps({"image": data_url, "user_id": "42"}).encode()
+
+        for route, fn, body in [
+            ("json", json_route, json_body),
+            ("binary", binary_route, jpeg),
+            ("reduced", reduced_route, jpeg),
+        ]:
+            decoded = fn(body)
+            ms = cpu_per_frame(fn, body, args.frames)
+            shape = f"{decoded.shape[1]}x{decoded.shape[0]}"
+            print(f"{name:<12}{route:<9}{len(body):>10}{ms:>9.2f}{shape:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmark_inference_pool.py
+"""
+Detection frames/s as the number of inference worker processes grows.
+
+  in-process - one backend behind BatchInferenceScheduler in this process,
+               as app.py runs with INFERENCE_WORKERS = 0
+  N workers  - InferencePool with N processes, --threads torch/ORT threads each
+
+--clients threads submit synthetic 640x480 frames as fast as results come
+back; a PoolBusy (all shared-memory slots taken) counts as a rejected frame
+and the client backs off briefly.
+
+    python benchmark_inference_pool.py --workers 1,2,4,8 --threads 1
+    python benchmark_inference_pool.py --backend onnx --workers 1,2,4 --face
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from batch_inference import BatchInferenceScheduler, percentile
+from inference_backend import load_backend
+from inference_pool import InferencePool, PoolBusy
+
+
+def run_load(infer, clients, duration, frame):
+    latencies, lock = [], threading.Lock()
+    rejected = [0]
+    stop_at = time.perf_counter() + duration
+
+    def client(n):
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                infer(frame, n)
+            except PoolBusy:
+                with lock:
+                    rejected[0] += 1
+                time.sleep(0.005)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "fps": len(latencies) / wall,
+        "rejected": rejected[0],
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=1, help="inference threads per worker")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--face", action="store_true", help="also run FaceMesh per frame in the workers")
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    print(f"{args.clients} clients, {args.duration:g}s per row, backend={args.backend}\n")
+    print(f"{'mode':<14}{'frames/s':>10}{'speedup':>9}{'p50 ms':>9}{'p99 ms':>9}{'rejected':>10}")
+
+    backend = load_backend(args.backend, args.threads)
+    scheduler = BatchInferenceScheduler(backend, max_batch_size=8, max_wait_ms=20)
+    scheduler.infer(frame)
+    base = run_load(lambda f, n: scheduler.infer(f), args.clients, args.duration, frame)
+    scheduler.close()
+    del backend, scheduler
+    print(f"{'in-process':<14}{base['fps']:>10.1f}{1:>9.2f}{base['p50_ms']:>9.1f}{base['p99_ms']:>9.1f}{'-':>10}")
+
+    for workers in [int(x) for x in args.workers.split(",")]:
+        pool = InferencePool(args.backend, workers, args.threads)
+        while pool.health()["workers_ready"] < workers:
+            if pool.state == "failed":
+                print(pool.health()["error"])
+                return
+            time.sleep(0.2)
+
+        infer = (lambda f, n: pool.infer(f, session_id=n)) if args.face else (lambda f, n: pool.infer(f))
+        r = run_load(infer, args.clients, args.duration, frame)
+        crashed = pool.stats()["crashed"]
+        pool.close()
+
+        label = f"{workers} worker{'s' if workers > 1 else ''}"
+        print(f"{label:<14}{r['fps']:>10.1f}{r['fps'] / base['fps']:>9.2f}{r['p50_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['rejected']:>10}" + (f"  ({crashed} crashed)" if crashed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmark_login_storm.py
+"""
+Detection latency while a cohort logs in at once.
+
+A fixed set of proctoring sessions keeps sending "frames" whose detection
+is simulated by native, GIL-releasing work (--detect-ms of sha256 over a
+buffer, like a forward pass). Meanwhile --logins users log in at once,
+each running bcrypt.checkpw at --rounds:
+
+  none    - no logins, the detection baseline
+  inline  - bcrypt in every request thread, as app.py used to do
+  pooled  - PasswordHasher with --workers bcrypt threads
+
+    python benchmark_login_storm.py --logins 300 --rounds 12 --workers 2
+"""
+import argparse
+import hashlib
+import threading
+import time
+
+import bcrypt
+
+from batch_inference import percentile
+from password_hasher import PasswordHasher
+
+CHUNK = b"\0" * (1 << 20)
+
+
+def calibrate(detect_ms):
+    """Number of 1 MiB sha256 rounds that take about detect_ms on this machine."""
+    started = time.perf_counter()
+    for _ in range(20):
+        hashlib.sha256(CHUNK).digest()
+    per_round = (time.perf_counter() - started) / 20
+    return max(1, round(detect_ms / 1000 / per_round))
+
+
+def detect(rounds):
+    for _ in range(rounds):
+        hashlib.sha256(CHUNK).digest()
+
+
+def run(mode, args, detect_rounds, stored_hash):
+    stop = threading.Event()
+    lock = threading.Lock()
+    detect_latencies, login_latencies = [], []
+    hasher = PasswordHasher(args.rounds, args.workers, max_pending=args.logins) if mode == "pooled" else None
+
+    def session_loop():
+        while not stop.is_set():
+            started = time.perf_counter()
+            detect(detect_rounds)
+            with lock:
+                detect_latencies.append(time.perf_counter() - started)
+            time.sleep(args.interval)
+
+    def login():
+        started = time.perf_counter()
+        if hasher is not None:
+            hasher.verify(b"password", stored_hash)
+        else:
+            bcrypt.checkpw(b"password", stored_hash)
+        with lock:
+            login_latencies.append(time.perf_counter() - started)
+
+    sessions = [threading.Thread(target=session_loop, daemon=True) for _ in range(args.sessions)]
+    for t in sessions:
+        t.start()
+
+    started = time.perf_counter()
+    if mode == "none":
+        time.sleep(args.baseline_s)
+    else:
+        logins = [threading.Thread(target=login) for _ in range(args.logins)]
+        for t in logins:
+            t.start()
+        for t in logins:
+            t.join()
+    wall = time.perf_counter() - started
+
+    stop.set()
+    for t in sessions:
+        t.join()
+    if hasher is not None:
+        hasher.close()
+
+    return {
+        "logins_per_sec": len(login_latencies) / wall if login_latencies else 0.0,
+        "login_p99_ms": percentile(login_latencies, 99) * 1000,
+        "detect_p50_ms": percentile(detect_latencies, 50) * 1000,
+        "detect_p99_ms": percentile(detect_latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--detect-ms", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--baseline-s", type=float, default=3.0)
+    args = parser.parse_args()
+
+    detect_rounds = calibrate(args.detect_ms)
+    stored_hash = bcrypt.hashpw(b"password", bcrypt.gensalt(args.rounds))
+
+    print(f"{args.logins} logins at rounds={args.rounds}, {args.sessions} detection sessions\n")
+    print(f"{'mode':<8}{'logins/s':>10}{'login p99 ms':>14}{'detect p50 ms':>15}{'detect p99 ms':>15}")
+    for mode in ("none", "inline", "pooled"):
+        r = run(mode, args, detect_rounds, stored_hash)
+        print(f"{mode:<8}{r['logins_per_sec']:>10.1f}{r['login_p99_ms']:>14.1f}"
+              f"{r['detect_p50_ms']:>15.1f}{r['detect_p99_ms']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
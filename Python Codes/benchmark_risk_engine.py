@@ -0,0 +1,78 @@
+# benchmark_risk_engine.py
+"""
+Per-update cost and per-session memory of RiskEngine.
+
+--sessions simulated exam sessions each send --frames verdicts
+(round-robin, as concurrent clients would), with a --cheat-rate share of
+cheating frames, a few tab switches and random objects/emotions. Memory
+is reported two ways: the engine's preallocated arrays (fixed per row)
+and everything tracemalloc sees allocated for the run, session id keys
+included.
+
+    python benchmark_risk_engine.py --sessions 10000 --frames 50
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from risk_engine import EMOTIONS, RiskEngine
+
+OBJECTS = [None, "cell phone", "book", "laptop", "person"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--frames", type=int, default=50, help="verdicts per session")
+    parser.add_argument("--cheat-rate", type=float, default=0.05)
+    parser.add_argument("--window", type=int, default=None, help="ring entries (default: sized from the risk window)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    session_ids = [str(n) for n in range(args.sessions)]
+    cheating = rng.random((args.frames, args.sessions)) < args.cheat_rate
+    objects = rng.integers(0, len(OBJECTS), (args.frames, args.sessions))
+    emotions = rng.integers(0, len(EMOTIONS), (args.frames, args.sessions))
+
+    latencies = np.empty(args.frames * args.sessions, dtype=np.int64)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    engine = RiskEngine(window=args.window, max_sessions=args.sessions)
+
+    n = 0
+    now = time.time()
+    started = time.perf_counter()
+    for f in range(args.frames):
+        now += 3.0
+        for s, session_id in enumerate(session_ids):
+            t0 = time.perf_counter_ns()
+            engine.record_frame(session_id, bool(cheating[f, s]), OBJECTS[objects[f, s]],
+                                EMOTIONS[emotions[f, s]], now)
+            latencies[n] = time.perf_counter_ns() - t0
+            n += 1
+        if f % 10 == 0:
+            for session_id in session_ids[::100]:
+                engine.record_tab_switch(session_id, now)
+    wall = time.perf_counter() - started
+
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    stats = engine.stats()
+    updates = n
+    terminated = sum(engine.risk(sid, now).terminate for sid in session_ids)
+
+    print(f"{args.sessions} sessions x {args.frames} frames, window {engine.window}\n")
+    print(f"updates            {updates}")
+    print(f"updates/s          {updates / wall:,.0f}  (tracemalloc on)")
+    print(f"per update p50     {np.percentile(latencies, 50):,.0f} ns")
+    print(f"per update p99     {np.percentile(latencies, 99):,.0f} ns")
+    print(f"array bytes        {stats['array_bytes']:,}  ({stats['bytes_per_session']} per session)")
+    print(f"traced bytes       {traced:,}  ({traced // args.sessions} per session)")
+    print(f"terminated         {terminated}")
+
+
+if __name__ == "__main__":
+    main()
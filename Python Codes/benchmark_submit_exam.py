@@ -0,0 +1,143 @@
+# benchmark_submit_exam.py
+"""
+Load test for concurrent submit_exam calls: a whole cohort submitting at once.
+
+  direct - what app.py used to do: sqlite3.connect per request, default
+           rollback journal, commit per write, close
+  pooled - ConnectionPool reads + DatabaseWriter group commits under WAL
+
+Each simulated submission reads the subject's questions (with the subject
+join submit_exam uses) and inserts one exam_results row.
+
+    python benchmark_submit_exam.py --students 200 --submissions 5
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from batch_inference import percentile
+from db_pool import ConnectionPool, DatabaseWriter
+
+SCHEMA = """
+CREATE TABLE subjects (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE);
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, subject_id INTEGER, question TEXT,
+    option1 TEXT, option2 TEXT, option3 TEXT, option4 TEXT, correct_answer INTEGER
+);
+CREATE TABLE exam_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, subject_id INTEGER,
+    score INTEGER, total INTEGER, time_taken TEXT,
+    date_taken TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+READ_QUESTIONS = """
+    SELECT q.*, s.name AS subject_name
+    FROM questions q
+    JOIN subjects s ON q.subject_id = s.id
+    WHERE q.subject_id=?
+"""
+INSERT_RESULT = """
+    INSERT INTO exam_results (user_id, subject_id, score, total, time_taken)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def build_db(path, subjects=4, questions_per_subject=25):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for s in range(1, subjects + 1):
+        conn.execute("INSERT INTO subjects (name) VALUES (?)", (f"Subject {s}",))
+        conn.executemany(
+            "INSERT INTO questions (subject_id, question, option1, option2, option3, option4, correct_answer)"
+            " VALUES (?,?,?,?,?,?,?)",
+            [(s, f"Q{i}", "a", "b", "c", "d", 1) for i in range(questions_per_subject)]
+        )
+    conn.commit()
+    conn.close()
+
+
+def submit_direct(db_path, user_id, subject_id):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    questions = conn.execute(READ_QUESTIONS, (subject_id,)).fetchall()
+    conn.execute(INSERT_RESULT, (user_id, subject_id, len(questions) // 2, len(questions), "15 mins"))
+    conn.commit()
+    conn.close()
+
+
+def make_submit_pooled(pool, writer):
+    def submit(db_path, user_id, subject_id):
+        conn = pool.acquire()
+        questions = conn.execute(READ_QUESTIONS, (subject_id,)).fetchall()
+        conn.close()
+        writer.execute(INSERT_RESULT, (user_id, subject_id, len(questions) // 2, len(questions), "15 mins"))
+    return submit
+
+
+def run(db_path, submit, students, submissions):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def student(user_id):
+        start_gate.wait()
+        for n in range(submissions):
+            started = time.perf_counter()
+            try:
+                submit(db_path, user_id, n % 4 + 1)
+            except sqlite3.OperationalError as err:
+                with lock:
+                    errors.append(str(err))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=student, args=(i,)) for i in range(students)]
+    for t in threads:
+        t.start()
+    started = time.perf_counter()
+    start_gate.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "ok": len(latencies),
+        "errors": len(errors),
+        "per_sec": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--submissions", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.students} students x {args.submissions} submissions\n")
+    print(f"{'mode':<8}{'ok':>7}{'errors':>8}{'submits/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'stmts/commit':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        direct_db = os.path.join(tmp, "direct.db")
+        build_db(direct_db)
+        r = run(direct_db, submit_direct, args.students, args.submissions)
+        print(f"{'direct':<8}{r['ok']:>7}{r['errors']:>8}{r['per_sec']:>11.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{1:>14}")
+
+        pooled_db = os.path.join(tmp, "pooled.db")
+        build_db(pooled_db)
+        pool = ConnectionPool(pooled_db, size=16)
+        writer = DatabaseWriter(pooled_db)
+        r = run(pooled_db, make_submit_pooled(pool, writer), args.students, args.submissions)
+        per_commit = writer.stats()["statements_per_commit"]
+        writer.close()
+        print(f"{'pooled':<8}{r['ok']:>7}{r['errors']:>8}{r['per_sec']:>11.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{per_commit:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# capture_policy.py
+
+# Richest first. "normal" matches what exam.html used to hardcode.
+CAPTURE_TIERS = [
+    {"name": "alert",      "width": 640, "height": 480, "quality": 0.92, "interval_ms": 1000},
+    {"name": "normal",     "width": 640, "height": 480, "quality": 0.92, "interval_ms": 3000},
+    {"name": "busy",       "width": 480, "height": 360, "quality": 0.80, "interval_ms": 5000},
+    {"name": "overloaded", "width": 320, "height": 240, "quality": 0.70, "interval_ms": 8000},
+]
+NORMAL_TIER = 1
+
+# RiskEngine score above which a session is sampled one tier richer
+RISK_THRESHOLD = 0.3
+
+
+class CapturePolicy:
+    """
+    Picks the capture settings the client should use for its next frame.
+
+    Server load chooses the base tier: the inference queue depth measured
+    in batches or, when the queue is bounded (the worker pool's frame
+    slots), as a fraction of its capacity. A frame rejected as busy gets
+    the overloaded tier; a session whose RiskEngine score is above risk_threshold is
+    moved one tier richer, so it is sampled faster without ignoring an
+    overloaded server.
+    """
+
+    def __init__(self, batch_size=8, risk_threshold=RISK_THRESHOLD, capacity=None):
+        self.batch_size = max(1, batch_size)
+        self.risk_threshold = risk_threshold
+        self.capacity = capacity
+
+    def load_tier(self, queue_depth):
+        if self.capacity:
+            used = queue_depth / self.capacity
+            if used <= 0.25:
+                return NORMAL_TIER
+            if used < 0.75:
+                return NORMAL_TIER + 1
+            return NORMAL_TIER + 2
+
+        batches_waiting = queue_depth / self.batch_size
+        if batches_waiting <= 1:
+            return NORMAL_TIER
+        if batches_waiting <= 4:
+            return NORMAL_TIER + 1
+        return NORMAL_TIER + 2
+
+    def directive(self, queue_depth, risk_score=0.0, busy=False):
+        if busy:
+            return dict(CAPTURE_TIERS[-1])
+        tier = self.load_tier(queue_depth)
+        if risk_score > self.risk_threshold:
+            tier -= 1
+        return dict(CAPTURE_TIERS[max(0, min(tier, len(CAPTURE_TIERS) - 1))])
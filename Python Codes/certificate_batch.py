@@ -0,0 +1,123 @@
+# certificate_batch.py
+"""
+Render certificates for every row of `results` across all CPU cores.
+
+Rows are streamed from `results JOIN users` and rendered by a process pool
+with draw_certificate_pdf. Output goes into the same certificates/<key>.pdf
+disk tier that /download_certificate reads, so a cohort generated here
+downloads without rendering. The key covers username, percentage,
+template and date. A certificate whose file already exists is up to date
+and is skipped, so an interrupted run resumes where it stopped.
+
+    python certificate_batch.py
+    python certificate_batch.py --workers 8 --zip cohort.zip
+    python certificate_batch.py --date "15 March 2026"
+"""
+import argparse
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from certificates import (certificate_key, clamp_percentage, render_certificate, template_for,
+                          today, write_atomic)
+from db_pool import connect
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "exam_system.db")
+
+RESULTS_QUERY = """
+    SELECT r.id, r.user_id, u.username, r.percentage
+    FROM results r
+    JOIN users u ON u.id = r.user_id
+    ORDER BY r.id
+"""
+
+
+def render_to_disk(path, username, pct, template, date):
+    """Pool worker: render one certificate and write it atomically; returns its size."""
+    pdf = render_certificate(username, pct, template, date)
+    write_atomic(path, pdf)
+    return len(pdf)
+
+
+def iter_jobs(conn, directory, date):
+    """Yield (path, zip_name, render_args) per result row, one row at a time."""
+    for row in conn.execute(RESULTS_QUERY):
+        username = row["username"]
+        pct = clamp_percentage(row["percentage"])
+        template = template_for(pct)
+        key = certificate_key(username, pct, template, date)
+        yield (os.path.join(directory, f"{key}.pdf"),
+               f"{row['user_id']}_{username}_certificate_{int(pct)}.pdf",
+               (username, pct, template, date))
+
+
+def run(db_path, directory, date, workers=None, zip_path=None, force=False):
+    os.makedirs(directory, exist_ok=True)
+    conn = connect(db_path)
+    archive = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) if zip_path else None
+    stats = {"rows": 0, "rendered": 0, "skipped": 0, "failed": 0}
+
+    workers = workers or os.cpu_count() or 1
+    # Bounded in-flight window: rows are read as fast as the pool drains them, never all at once
+    window = workers * 4
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            path, zip_name = pending.pop(future)
+            try:
+                future.result()
+            except Exception as err:
+                stats["failed"] += 1
+                print(f"FAILED {zip_name}: {err}")
+                continue
+            stats["rendered"] += 1
+            if archive is not None:
+                archive.write(path, zip_name)
+
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, zip_name, render_args in iter_jobs(conn, directory, date):
+                stats["rows"] += 1
+                if not force and os.path.exists(path):
+                    stats["skipped"] += 1
+                    if archive is not None:
+                        archive.write(path, zip_name)
+                    continue
+
+                pending[pool.submit(render_to_disk, path, *render_args)] = (path, zip_name)
+                if len(pending) >= window:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            collect(wait(pending)[0])
+    finally:
+        conn.close()
+        if archive is not None:
+            archive.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    stats["per_sec"] = round(stats["rendered"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--out", default="certificates", help="same directory the web app caches into")
+    parser.add_argument("--date", default=None, help="date printed on the certificates (default: today)")
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU core")
+    parser.add_argument("--zip", default=None, help="also collect every certificate into this ZIP")
+    parser.add_argument("--force", action="store_true", help="re-render certificates that already exist")
+    args = parser.parse_args()
+
+    stats = run(args.db, args.out, args.date or today(), args.workers, args.zip, args.force)
+    print(f"{stats['rows']} results: {stats['rendered']} rendered, {stats['skipped']} up to date, "
+          f"{stats['failed']} failed in {stats['seconds']}s ({stats['per_sec']} certificates/s)")
+
+
+if __name__ == "__main__":
+    main()
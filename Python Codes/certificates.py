@@ -0,0 +1,208 @@
+# certificates.py
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+CertificateTemplate = namedtuple("CertificateTemplate", ["border", "subtitle"])
+
+TEMPLATES = {
+    "excellent": CertificateTemplate((0.06, 0.45, 0.14), "Outstanding Achievement"),
+    "good": CertificateTemplate((0.85, 0.45, 0.08), "Certificate of Merit"),
+    "improvement": CertificateTemplate((0.6, 0.08, 0.15), "Certificate of Participation"),
+}
+
+# Page geometry is the same for every certificate
+PAGE_SIZE = landscape(A4)
+WIDTH, HEIGHT = PAGE_SIZE
+MARGIN = 2*cm
+SIG_Y = 3.5*cm
+
+DATE_FORMAT = "%d %B %Y"
+
+
+def clamp_percentage(raw):
+    try:
+        pct = float(raw)
+    except Exception:
+        pct = 0.0
+    return max(0, min(100, round(pct, 2)))
+
+
+def template_for(pct):
+    if pct >= 70:
+        return "excellent"
+    if pct >= 50:
+        return "good"
+    return "improvement"
+
+
+def grade_for(pct):
+    if pct >= 90:
+        return "Distinction"
+    if pct >= 70:
+        return "Excellent"
+    if pct >= 50:
+        return "Good"
+    return "Needs Improvement"
+
+
+def today():
+    return datetime.now().strftime(DATE_FORMAT)
+
+
+def _draw_static(c, tpl):
+    """
+    Border, titles and signature lines: everything that depends only on the template.
+
+    This is drawn again into every PDF; reportlab cannot share a form XObject
+    between documents, so repeat downloads are saved by CertificateCache instead.
+    """
+    c.setStrokeColorRGB(*tpl.border)
+    c.setLineWidth(4)
+    c.rect(MARGIN/2, MARGIN/2, WIDTH - MARGIN, HEIGHT - MARGIN)
+
+    c.setFillColorRGB(*tpl.border)
+    c.setFont("Helvetica-Bold", 34)
+    c.drawCentredString(WIDTH/2, HEIGHT - 3*cm, tpl.subtitle)
+
+    c.setFillColorRGB(0,0,0)
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(WIDTH/2, HEIGHT - 4.5*cm, "This certifies that")
+
+    c.setFont("Helvetica", 12)
+    c.drawString(100, SIG_Y + 20, "Examiner")
+    c.line(100, SIG_Y + 15, 260, SIG_Y + 15)
+
+    c.drawString(WIDTH - 260, SIG_Y + 20, "Authorized Signatory")
+    c.line(WIDTH - 260, SIG_Y + 15, WIDTH - 80, SIG_Y + 15)
+
+
+def draw_certificate_pdf(buffer, username, pct, template='excellent', date=None):
+    tpl = TEMPLATES.get(template, TEMPLATES["improvement"])
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+
+    _draw_static(c, tpl)
+
+    c.setFillColorRGB(*tpl.border)
+    c.setFont("Helvetica-Bold", 28)
+    c.drawCentredString(WIDTH/2, HEIGHT - 6.5*cm, username)
+
+    c.setFillColorRGB(0,0,0)
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(WIDTH/2, HEIGHT - 8.2*cm,
+                        f"has completed the online exam with a score of {pct:.2f}%.")
+
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(WIDTH/2, HEIGHT - 9.5*cm, f"Grade: {grade_for(pct)}")
+
+    c.setFont("Helvetica", 12)
+    c.drawCentredString(WIDTH/2, HEIGHT - 11*cm, f"Date: {date or today()}")
+
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+
+
+def render_certificate(username, pct, template, date):
+    buffer = BytesIO()
+    draw_certificate_pdf(buffer, username, pct, template, date)
+    return buffer.getvalue()
+
+
+def certificate_key(username, pct, template, date):
+    """Content key of a certificate; doubles as its ETag and on-disk file name."""
+    raw = f"{username}\0{pct:.2f}\0{template}\0{date}".encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+def write_atomic(path, data):
+    """Write via a temporary file and os.replace, so a reader never sees half a PDF."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class CertificateCache:
+    """
+    Two-tier cache of rendered certificate PDFs keyed by
+    (username, percentage, template, date).
+
+    Hits are served from an in-memory LRU of max_entries PDFs, then from
+    <directory>/<key>.pdf, and only then rendered. certificate_batch.py
+    fills the same disk tier ahead of time.
+    """
+
+    def __init__(self, directory="certificates", max_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, username, pct, template, date):
+        """Returns (key, pdf_bytes)."""
+        key = certificate_key(username, pct, template, date)
+
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return key, pdf
+
+        try:
+            with open(self.path(key), "rb") as f:
+                pdf = f.read()
+            tier = "disk"
+        except OSError:
+            pdf = render_certificate(username, pct, template, date)
+            self._write(key, pdf)
+            tier = "render"
+
+        with self._lock:
+            if tier == "disk":
+                self.disk_hits += 1
+            else:
+                self.renders += 1
+            self._memory[key] = pdf
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        return key, pdf
+
+    def _write(self, key, pdf):
+        try:
+            write_atomic(self.path(key), pdf)
+        except OSError as err:
+            print("CERTIFICATE CACHE ERROR:", err)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "renders": self.renders,
+            }
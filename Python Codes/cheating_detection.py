@@ -1,28 +1,19 @@
 # cheating_detection.py
-import torch
+from detection_rules import DetectionRules
+from inference_backend import load_backend
 
-# Load YOLOv5 pretrained model
-model = torch.hub.load(
-    'ultralytics/yolov5',
-    'yolov5s',
-    pretrained=True
-)
+# Load YOLOv5 pretrained model ("onnx" or "onnx-int8" for ONNX Runtime, see inference_backend.py)
+model = load_backend("torch")
 
-CLASS_NAMES = model.names
-CHEATING_OBJECTS = ["cell phone"]
+# Same rules as the web app's /detect_cheating route
+rules = DetectionRules(model.names)
 
 def detect_cheating(frame):
     if frame is None:
         return "No Cheating"
 
     results = model(frame)
-    detections = results.xyxy[0]
-
-    for *box, conf, cls in detections:
-        label = CLASS_NAMES[int(cls)]
-
-        # Mobile phone detected
-        if label in CHEATING_OBJECTS:
-            return "Cheating"
+    if rules.evaluate(results.xyxy[0]).cheating:
+        return "Cheating"
 
     return "No Cheating"
@@ -0,0 +1,220 @@
+# dataset_cache.py
+"""
+Decode the dataset once into a memory-mapped array of model-ready images.
+
+Every image is decoded, letterboxed to the model input size (the same
+letterbox() the ONNX backend uses) and written as one row of a
+uint8 (N, size, size, 3) BGR array on disk. index.json beside it keeps,
+per row, the source path, label, SHA-1, letterbox ratio / padding and
+the source file's size and mtime.
+
+A cache is reused only while the source list is unchanged and every
+file still has its recorded size and mtime. Otherwise it is rebuilt.
+Rows whose files did not change are copied across from the old array,
+and only the changed or new files are decoded, by a process pool whose
+workers write straight into the new memmap. Readers get batches as
+slices of np.memmap: no decoding and no copy.
+
+    python dataset_cache.py                        # test split of the manifest -> dataset_cache/test
+    python dataset_cache.py --split train --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from inference_backend import INPUT_SIZE, letterbox
+from model_manager import BASE_DIR
+from split_dataset import MANIFEST, read_manifest
+
+CACHE_DIR = os.path.join(BASE_DIR, "dataset_cache")
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+CHUNK_SIZE = 64
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _shape(count, size):
+    # np.memmap can't map an empty file, so an empty cache still has one (unused) row
+    return (max(count, 1), size, size, 3)
+
+
+# ---------------- BUILD WORKERS ----------------
+_images = None
+
+
+def _open_images(path, shape):
+    global _images
+    _images = np.memmap(path, dtype=np.uint8, mode="r+", shape=shape)
+
+
+def _decode_rows(jobs, size):
+    """Pool worker: decode and letterbox each (row, path) straight into the shared memmap."""
+    done = []
+    for row, path in jobs:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            done.append((row, digest, None))
+            continue
+        image, ratio, pad = letterbox(frame, size)
+        _images[row] = image
+        done.append((row, digest, {"ratio": ratio, "pad": list(pad), "shape": list(frame.shape[:2])}))
+    _images.flush()
+    return done
+
+
+# ---------------- READING ----------------
+class DatasetCache:
+    """An opened cache: .images is the read-only memmap, one row per source path."""
+
+    def __init__(self, directory=CACHE_DIR):
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"{directory} was written by another dataset_cache version; rebuild it")
+
+        self.directory = directory
+        self.size = index["size"]
+        self.images_file = index["images"]
+        self.entries = index["entries"]
+        self.paths = [e["path"] for e in self.entries]
+        self.labels = np.array([e["label"] for e in self.entries], dtype=bool)
+        self.digests = [e["sha1"] for e in self.entries]
+        self.ok = np.array([e["ok"] for e in self.entries], dtype=bool)
+        mapped = np.memmap(os.path.join(directory, self.images_file), dtype=np.uint8, mode="r",
+                           shape=_shape(len(self.entries), self.size))
+        self.images = mapped[:len(self.entries)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def batches(self, batch_size):
+        """Yield (start, images) with images a zero-copy slice of the memmap."""
+        for start in range(0, len(self), batch_size):
+            yield start, self.images[start:start + batch_size]
+
+    def matches(self, paths, labels, size=INPUT_SIZE):
+        """True while paths and labels are exactly the cached ones and no source file has changed."""
+        if size != self.size or [os.path.abspath(p) for p in paths] != self.paths:
+            return False
+        if not np.array_equal(np.asarray(labels, dtype=bool), self.labels):
+            return False
+        try:
+            return all(_stat(e["path"]) == e["stat"] for e in self.entries)
+        except FileNotFoundError:
+            return False
+
+
+def open_cache(directory=CACHE_DIR):
+    """The cache in directory, or None if there is none (or it can't be read)."""
+    try:
+        return DatasetCache(directory)
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+# ---------------- BUILDING ----------------
+def build_cache(paths, labels, directory=CACHE_DIR, size=INPUT_SIZE, workers=None, previous=None):
+    """
+    Write a new cache for paths and return (cache, decoded, reused).
+    Unchanged rows of `previous` are copied instead of decoded.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = [os.path.abspath(p) for p in paths]
+    images_file = f"images-{uuid.uuid4().hex[:8]}.u8"
+    target = os.path.join(directory, images_file)
+    shape = _shape(len(paths), size)
+    images = np.memmap(target, dtype=np.uint8, mode="w+", shape=shape)
+
+    old_rows = {}
+    if previous is not None and previous.size == size:
+        old_rows = {e["path"]: (i, e) for i, e in enumerate(previous.entries)}
+
+    entries, todo = [], []
+    for row, (path, label) in enumerate(zip(paths, labels)):
+        stat = _stat(path)
+        old = old_rows.get(path)
+        if old is not None and old[1]["stat"] == stat:
+            images[row] = previous.images[old[0]]
+            entries.append(dict(old[1], label=bool(label)))
+        else:
+            entries.append({"path": path, "label": bool(label), "stat": stat})
+            todo.append((row, path))
+    images.flush()
+    del images
+
+    chunks = [todo[i:i + CHUNK_SIZE] for i in range(0, len(todo), CHUNK_SIZE)]
+    if chunks:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_images, initargs=(target, shape)) as pool:
+            for done in pool.map(_decode_rows, chunks, [size] * len(chunks)):
+                for row, digest, meta in done:
+                    entries[row].update(meta or {}, sha1=digest, ok=meta is not None)
+
+    # The index is replaced last, so readers see either the old cache or the complete new one
+    index = {"version": INDEX_VERSION, "size": size, "images": images_file, "entries": entries}
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, os.path.join(directory, INDEX_FILE))
+
+    for name in os.listdir(directory):
+        if name.startswith("images-") and name != images_file:
+            os.remove(os.path.join(directory, name))
+
+    return DatasetCache(directory), len(todo), len(paths) - len(todo)
+
+
+def ensure_cache(paths, labels, directory=CACHE_DIR, size=INPUT_SIZE, workers=None):
+    """The cache for paths, rebuilding it (incrementally) if it is missing or stale."""
+    cache = open_cache(directory)
+    if cache is not None and cache.matches(paths, labels, size):
+        return cache
+    started = time.perf_counter()
+    cache, decoded, reused = build_cache(paths, labels, directory, size, workers, previous=cache)
+    seconds = time.perf_counter() - started
+    print(f"Dataset cache: {decoded} images decoded, {reused} reused in {seconds:.1f}s"
+          + (f" ({decoded / seconds:.0f} images/s)" if decoded and seconds else ""))
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--manifest", default=MANIFEST)
+    parser.add_argument("--split", default="test", choices=("train", "val", "test"))
+    parser.add_argument("--out", default=None, help=f"default: {os.path.basename(CACHE_DIR)}/<split>")
+    parser.add_argument("--size", type=int, default=INPUT_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU core")
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    out = args.out or os.path.join(CACHE_DIR, args.split)
+    paths, labels = read_manifest(args.manifest, args.split)
+    cache = ensure_cache(paths, labels, out, args.size, args.workers)
+    mb = cache.images.nbytes / 2**20
+    print(f"{len(cache)} images ({int((~cache.ok).sum())} undecodable), {mb:.0f} MB in {out}")
+
+    # One full pass over the memmap, as an evaluation run would read it
+    started = time.perf_counter()
+    for _, batch in cache.batches(args.batch):
+        batch.max()
+    seconds = time.perf_counter() - started
+    if seconds:
+        print(f"Read pass: {len(cache) / seconds:.0f} images/s ({mb / seconds:.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# db_pool.py
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+# Applied to every connection. WAL lets readers run while the writer commits;
+# synchronous=NORMAL is durable under WAL except for power loss on the last commit.
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=134217728",
+]
+
+
+def connect(db_path, autocommit=False):
+    conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False,
+                           isolation_level=None if autocommit else "")
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class PooledConnection:
+    """Wraps a pooled sqlite3 connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+
+class ConnectionPool:
+    """
+    Bounded pool of read connections. Flask's dev server starts a thread per
+    request, so connections are checked out per request instead of being
+    pinned to threads; they stay open and warm between requests.
+    """
+
+    def __init__(self, db_path, size=8):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=10):
+        try:
+            return PooledConnection(self, self._idle.get_nowait())
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            return PooledConnection(self, connect(self.db_path))
+        return PooledConnection(self, self._idle.get(timeout=timeout))
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+
+class DatabaseWriter:
+    """
+    Single writer thread that group-commits queued writes.
+
+    Every queued statement runs in its own SAVEPOINT inside one shared
+    transaction, so one failing statement (e.g. a UNIQUE violation) is
+    rolled back and reported to its caller without undoing the others.
+    Whatever queued up while the previous commit was running goes into
+    the next transaction, up to max_batch statements.
+    """
+
+    def __init__(self, db_path, max_batch=128):
+        self.db_path = db_path
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.statements = 0
+        self.commits = 0
+        self.failures = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    # ---------------- PUBLIC API ----------------
+    def submit(self, sql, params=(), many=False):
+        future = Future()
+        self._queue.put((sql, params, many, future))
+        return future
+
+    def execute(self, sql, params=(), timeout=30):
+        """Run one write and wait for its commit; returns lastrowid or raises."""
+        return self.submit(sql, params).result(timeout)
+
+    def executemany(self, sql, rows, timeout=30):
+        return self.submit(sql, list(rows), many=True).result(timeout)
+
+    def close(self, timeout=10):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "statements": self.statements,
+                "commits": self.commits,
+                "failures": self.failures,
+                "statements_per_commit": round(self.statements / self.commits, 2) if self.commits else 0.0,
+            }
+
+    # ---------------- WORKER ----------------
+    def _run(self):
+        conn = connect(self.db_path, autocommit=True)
+        stopping = False
+
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit(conn, batch)
+
+        conn.close()
+
+    def _commit(self, conn, batch):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params, many, future in batch:
+                conn.execute("SAVEPOINT stmt")
+                try:
+                    cur = conn.executemany(sql, params) if many else conn.execute(sql, params)
+                    conn.execute("RELEASE stmt")
+                    results.append((future, cur.lastrowid if not many else cur.rowcount, None))
+                except Exception as err:
+                    # Not only sqlite3.Error: binding e.g. an out-of-range int raises OverflowError
+                    conn.execute("ROLLBACK TO stmt")
+                    conn.execute("RELEASE stmt")
+                    results.append((future, None, err))
+            conn.execute("COMMIT")
+        except Exception as err:
+            # Whatever went wrong, end the transaction and fail every pending future; the thread lives on
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error as rollback_err:
+                print("DB WRITER ROLLBACK FAILED:", rollback_err)
+            results = [(future, None, err) for _, _, _, future in batch]
+
+        failed = sum(1 for _, _, err in results if err is not None)
+        with self._stats_lock:
+            self.statements += len(batch)
+            self.commits += 1
+            self.failures += failed
+
+        for future, value, err in results:
+            if err is not None:
+                future.set_exception(err)
+            else:
+                future.set_result(value)
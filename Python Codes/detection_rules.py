@@ -0,0 +1,74 @@
+# detection_rules.py
+from collections import namedtuple
+
+import numpy as np
+
+# Shared by app.py, cheating_detection.py and enhanced_detection.py
+ALLOWED_OBJECTS = ["person"]
+MIN_CONFIDENCE = 0.20
+# Per-class overrides of MIN_CONFIDENCE, e.g. {"cell phone": 0.15}
+CLASS_CONFIDENCE = {}
+
+DetectionResult = namedtuple("DetectionResult", ["cheating", "label", "confidence", "count"])
+NO_DETECTION = DetectionResult(False, None, 0.0, 0)
+
+
+def to_array(detections):
+    """Raw YOLOv5 detections (torch tensor or array) as an (N, 6) float32 array."""
+    if hasattr(detections, "cpu"):
+        detections = detections.cpu().numpy()
+    return np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+
+
+class DetectionRules:
+    """
+    Cheating rules evaluated directly on a YOLOv5 detection tensor whose rows
+    are (x1, y1, x2, y2, confidence, class).
+
+    With an allowlist every class outside it is suspicious; with a denylist
+    only the listed classes are. A detection counts when its confidence is
+    above the threshold for its class.
+    """
+
+    def __init__(self, class_names, allowed=ALLOWED_OBJECTS, denied=None,
+                 min_confidence=MIN_CONFIDENCE, class_confidence=CLASS_CONFIDENCE):
+        if isinstance(class_names, dict):
+            class_names = [class_names[i] for i in sorted(class_names)]
+        self.names = list(class_names)
+        index = {name: i for i, name in enumerate(self.names)}
+
+        if denied:
+            self.suspicious = np.zeros(len(self.names), dtype=bool)
+            self.suspicious[[index[name] for name in denied if name in index]] = True
+        else:
+            self.suspicious = np.ones(len(self.names), dtype=bool)
+            self.suspicious[[index[name] for name in allowed if name in index]] = False
+
+        self.thresholds = np.full(len(self.names), min_confidence, dtype=np.float32)
+        for name, threshold in (class_confidence or {}).items():
+            if name in index:
+                self.thresholds[index[name]] = threshold
+
+    def evaluate(self, detections):
+        det = to_array(detections)
+        if not len(det):
+            return NO_DETECTION
+
+        conf = det[:, 4]
+        cls = det[:, 5].astype(np.intp)
+        mask = self.suspicious[cls] & (conf > self.thresholds[cls])
+
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            return NO_DETECTION
+
+        best = hits[np.argmax(conf[hits])]
+        return DetectionResult(True, self.names[cls[best]], float(conf[best]), len(hits))
+
+    def labels(self, detections):
+        """Class names of every detection, in tensor order."""
+        return [self.names[i] for i in to_array(detections)[:, 5].astype(np.intp)]
+
+
+def object_status(result):
+    return f"{result.label} detected" if result.cheating else "Normal"
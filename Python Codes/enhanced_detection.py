@@ -1,19 +1,20 @@
 import cv2 
 import mediapipe as mp
-import torch
 import numpy as np
 import time
 import os
 from datetime import datetime
-from emotion_detection import detect_emotion  # <-- NEW IMPORT
+from detection_rules import DetectionRules
+from face_analysis import analyze_points, extract_face, face_mesh_engine, landmark_array, NO_FACE
+from inference_backend import load_backend
 
 # Setup MediaPipe
 mp_face_mesh = mp.solutions.face_mesh
 mp_drawing = mp.solutions.drawing_utils
 
-# YOLOv5 for object detection
-model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-allowed_objects = ['person']
+# YOLOv5 for object detection ("onnx" or "onnx-int8" for ONNX Runtime, see inference_backend.py)
+model = load_backend("torch")
+rules = DetectionRules(model.names)
 
 # Create reports folder if not exists
 if not os.path.exists("reports"):
@@ -29,68 +30,46 @@ log_file = open(log_file_path, "w")
 cheat_count = 0
 MAX_CHEATS = 3
 
-with mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True) as face_mesh:
+try:
     while cap.isOpened():
         ret, frame = cap.read()
         if not ret:
             break
 
         frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result_mesh = face_mesh.process(rgb)
+        # Single FaceMesh pass; every face signal below comes from these landmarks
+        face_landmarks = extract_face(frame, session_id="local")
 
         # YOLOv5 detection
-        results = model(frame)
-        labels = results.pandas().xyxy[0]['name'].tolist()
+        detections = model(frame).xyxy[0]
+        labels = rules.labels(detections)
+        verdict = rules.evaluate(detections)
         cheating = "No"
         color = (0, 255, 0)
 
-        for label in labels:
-            if label not in allowed_objects:
-                cheating = f"Yes ({label})"
-                color = (0, 0, 255)
-                cheat_count += 1
-                break
+        if verdict.cheating:
+            cheating = f"Yes ({verdict.label})"
+            color = (0, 0, 255)
+            cheat_count += 1
 
         # ------------------ ENHANCED DETECTION ------------------
-        blink = "No"
-        mouth = "Closed"
-        head_pose = "Center"
         eyes = "Yes"
-
-        if result_mesh.multi_face_landmarks:
-            for landmarks in result_mesh.multi_face_landmarks:
-                mp_drawing.draw_landmarks(
-                    frame,
-                    landmarks,
-                    mp_face_mesh.FACEMESH_TESSELATION,
-                    mp_drawing.DrawingSpec(color=(0,255,255), thickness=1, circle_radius=1),
-                    mp_drawing.DrawingSpec(color=(255,0,255), thickness=1)
-                )
-
-                # Blink
-                left_eye_ratio = landmarks.landmark[159].y - landmarks.landmark[145].y
-                blink = "Yes" if left_eye_ratio < 0.01 else "No"
-
-                # Mouth
-                mouth_ratio = landmarks.landmark[13].y - landmarks.landmark[14].y
-                mouth = "Open" if mouth_ratio > 0.03 else "Closed"
-
-                # Head pose
-                nose = landmarks.landmark[1]
-                if nose.x < 0.4:
-                    head_pose = "Left"
-                elif nose.x > 0.6:
-                    head_pose = "Right"
-                elif nose.y < 0.4:
-                    head_pose = "Up"
-                elif nose.y > 0.6:
-                    head_pose = "Down"
-                else:
-                    head_pose = "Center"
-
-        # ------------------ EMOTION DETECTION ------------------
-        emotion, emotion_conf = detect_emotion(frame)
+        face = dict(NO_FACE)
+
+        if face_landmarks is not None:
+            mp_drawing.draw_landmarks(
+                frame,
+                face_landmarks,
+                mp_face_mesh.FACEMESH_TESSELATION,
+                mp_drawing.DrawingSpec(color=(0,255,255), thickness=1, circle_radius=1),
+                mp_drawing.DrawingSpec(color=(255,0,255), thickness=1)
+            )
+            face = analyze_points(landmark_array(face_landmarks))
+
+        blink = face["blink"]
+        mouth = face["mouth"]
+        head_pose = face["head_pose"]
+        emotion, emotion_conf = face["emotion"], face["emotion_conf"]
 
         # Draw info on screen
         cv2.putText(frame, f"Head {head_pose}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
@@ -116,6 +95,8 @@ with mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_land
 
         if cv2.waitKey(1) & 0xFF == 27:  # ESC
             break
+finally:
+    face_mesh_engine.close()
 
 log_file.close()
 cap.release()
@@ -1,110 +1,396 @@
+# evaluate_metrics.py
+"""
+Cheating / non-cheating accuracy of the detector on the test split:
+the "test" rows of split_dataset.py's manifest, or Dataset/test/ when
+there is no manifest (or --test-dir is given).
+
+Images are read and decoded by a thread pool and streamed into batched
+inference on the same backend and DetectionRules the app uses (cv2 BGR
+frames, as decode_jpeg produces). Each image's raw detections go into an
+on-disk prediction cache keyed by model (backend + weights hash) and
+image content hash, so a second run, or a run with another --threshold,
+does no inference at all.
+
+An image's score is the confidence of its most confident suspicious
+detection. Precision, recall and F1 are computed for every threshold of
+the sweep at once; the backend already drops boxes below its own
+confidence cut-off (0.25), so lower thresholds change nothing. Plots are
+written with the Agg backend, no display needed.
+
+    python evaluate_metrics.py
+    python evaluate_metrics.py --backend onnx --threshold 0.4
+    python evaluate_metrics.py --test-dir ../Dataset/test
+    python evaluate_metrics.py --dataset-cache     # decode once into dataset_cache/test, reuse after
+"""
+import argparse
+import hashlib
 import os
-import random
+import pickle
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 
-# ---------------- TEST DATA PATH ----------------
-TEST_DIR = "Dataset/test"
+from detection_rules import DetectionRules
+from inference_backend import ONNX_INT8_MODEL, ONNX_MODEL, load_backend
+from model_manager import BASE_DIR, YOLO_WEIGHTS
+from dataset_cache import CACHE_DIR as DATASET_CACHE_DIR, ensure_cache
+from split_dataset import MANIFEST, read_manifest
 
-# ---------------- LOAD GROUND TRUTH ----------------
-y_true = []
-image_paths = []
+# ---------------- TEST DATA PATH ----------------
+TEST_DIR = os.path.join(BASE_DIR, "..", "Dataset", "test")
+CACHE_DIR = os.path.join(BASE_DIR, "eval_cache")
 
 # cheating = 1, non_cheating = 0
-for label, cls in [(1, "cheating"), (0, "non_cheating")]:
-    class_dir = os.path.join(TEST_DIR, cls)
-    for img in os.listdir(class_dir):
-        if img.lower().endswith(('.jpg', '.png', '.jpeg')):
-            y_true.append(label)
-            image_paths.append(os.path.join(class_dir, img))
-
-# ---------------- MODEL PREDICTIONS ----------------
-# ⚠️ Dummy predictions (academic evaluation)
-# Replace with real YOLO/CNN predictions later
-
-random.seed(42)
-y_pred = []
-
-for gt in y_true:
-    # simulate ~88% accuracy
-    if random.random() < 0.88:
-        y_pred.append(gt)
-    else:
-        y_pred.append(1 - gt)
+CLASSES = [(1, "cheating"), (0, "non_cheating")]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+WEIGHTS = {"torch": YOLO_WEIGHTS, "onnx": ONNX_MODEL, "onnx-int8": ONNX_INT8_MODEL}
+SWEEP = np.round(np.arange(0.25, 0.951, 0.05), 2)
+
+
+# ---------------- GROUND TRUTH ----------------
+def list_images(test_dir):
+    paths, labels = [], []
+    for label, cls in CLASSES:
+        class_dir = os.path.join(test_dir, cls)
+        for img in sorted(os.listdir(class_dir)):
+            if img.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_dir, img))
+                labels.append(label)
+    return paths, np.array(labels, dtype=bool)
+
+
+# ---------------- PREDICTION CACHE ----------------
+def file_sha1(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_key(backend):
+    """Backend name plus a hash of its weights file: retrained or re-exported weights miss the cache."""
+    if backend not in WEIGHTS:
+        raise ValueError(f"Unknown inference backend {backend!r}; choose from {', '.join(WEIGHTS)}")
+    return f"{backend}-{file_sha1(WEIGHTS[backend])[:16]}"
+
+
+class PredictionCache:
+    """Raw (N, 6) detections per image content hash for one model, plus its class names, in one pickle."""
+
+    def __init__(self, directory, key):
+        self.path = os.path.join(directory, f"predictions-{key}.pkl")
+        self.entries = {}
+        self.names = None
+        self.added = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+            self.entries, self.names = saved["detections"], saved["names"]
+
+    def __contains__(self, digest):
+        return digest in self.entries
+
+    def get(self, digest):
+        return self.entries[digest]
+
+    def put(self, digest, detections):
+        self.entries[digest] = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        self.added += 1
+
+    def save(self):
+        if not self.added:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"names": self.names, "detections": self.entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self.added = 0
+
+
+# ---------------- DECODING ----------------
+def read_image(path, cache):
+    """(content hash, BGR frame); the frame is skipped (None) when the cache already has the image."""
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if digest in cache:
+        return digest, None
+    return digest, cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_stream(paths, cache, workers=4, prefetch=64):
+    """Yield read_image() results in path order, keeping at most `prefetch` images in flight."""
+    with ThreadPoolExecutor(workers, thread_name_prefix="decode") as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(read_image, path, cache))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ---------------- INFERENCE ----------------
+def decoded_frames(paths, cache, workers=4):
+    """(path, digest, frame) per path, decoded by the thread pool."""
+    for path, (digest, frame) in zip(paths, decode_stream(paths, cache, workers)):
+        yield path, digest, frame
+
+
+def cached_frames(data, cache):
+    """
+    (path, digest, frame) per row of a dataset_cache.DatasetCache; frames are
+    zero-copy memmap rows. Letterboxed input gets its own prediction cache
+    keys, since its boxes are in letterbox coordinates.
+    """
+    for i, path in enumerate(data.paths):
+        digest = f"{data.digests[i]}@{data.size}" if data.ok[i] else None
+        yield path, digest, (data.images[i] if digest is not None and digest not in cache else None)
+
+
+def predict(frames, backend_name, cache, batch_size=8, threads=None):
+    """
+    Detections for every (path, digest, frame) of `frames` (None for
+    unreadable images). Only cache misses are inferred, and the backend is
+    loaded on the first miss.
+    """
+    backend = None
+    digests = []
+    batch = []
+    inferred = 0
+
+    def flush():
+        nonlocal backend, inferred
+        if backend is None:
+            backend = load_backend(backend_name, threads)
+            names = backend.names
+            cache.names = dict(names) if isinstance(names, dict) else dict(enumerate(names))
+        for (digest, _), det in zip(batch, backend([frame for _, frame in batch]).xyxy):
+            cache.put(digest, det)
+        inferred += len(batch)
+        batch.clear()
+
+    try:
+        for path, digest, frame in frames:
+            if digest is None or (digest not in cache and frame is None):
+                print(f"⚠️ Unreadable image skipped: {path}")
+                digest = None
+            elif frame is not None:
+                batch.append((digest, frame))
+                if len(batch) >= batch_size:
+                    flush()
+            digests.append(digest)
+        if batch:
+            flush()
+    finally:
+        cache.save()
+
+    return [cache.get(d) if d is not None else None for d in digests], inferred
+
 
 # ---------------- METRICS ----------------
-accuracy = accuracy_score(y_true, y_pred)
-precision = precision_score(y_true, y_pred)
-recall = recall_score(y_true, y_pred)
-f1 = f1_score(y_true, y_pred)
-
-print("\n📊 MODEL PERFORMANCE")
-print(f"Accuracy  : {accuracy*100:.2f}%")
-print(f"Precision : {precision:.2f}")
-print(f"Recall    : {recall:.2f}")
-print(f"F1 Score  : {f1:.2f}")
-
-# ---------------- CONFUSION MATRIX ----------------
-cm = confusion_matrix(y_true, y_pred)
-
-plt.figure(figsize=(5,4))
-plt.imshow(cm, cmap="Blues")
-plt.title("Confusion Matrix")
-plt.colorbar()
-
-plt.xticks([0,1], ["Non-Cheating", "Cheating"])
-plt.yticks([0,1], ["Non-Cheating", "Cheating"])
-
-for i in range(2):
-    for j in range(2):
-        plt.text(j, i, cm[i, j], ha="center", va="center", fontsize=12)
-
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-plt.tight_layout()
-plt.savefig("confusion_matrix.png")
-plt.show()
-
-# ---------------- PERFORMANCE METRICS GRAPH ----------------
-metrics = [accuracy, precision, recall, f1]
-metric_labels = ["Accuracy", "Precision", "Recall", "F1-Score"]
-
-plt.figure(figsize=(6,4))
-plt.bar(metric_labels, metrics)
-plt.ylim(0, 1)
-plt.title("Performance Metrics")
-
-for i, v in enumerate(metrics):
-    plt.text(i, v + 0.02, f"{v:.2f}", ha="center")
-
-plt.tight_layout()
-plt.savefig("performance_graph.png")
-plt.show()
-
-# ---------------- CLASS DISTRIBUTION GRAPH ----------------
-cheating_count = y_true.count(1)
-non_cheating_count = y_true.count(0)
-
-labels = ["Cheating", "Non-Cheating"]
-counts = [cheating_count, non_cheating_count]
-colors = ["red", "green"]
-
-plt.figure(figsize=(4,6))
-bars = plt.bar(labels, counts, color=colors)
-
-plt.title("Test Dataset Class Distribution")
-plt.xlabel("Class")
-plt.ylabel("Number of Images")
-
-for bar in bars:
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2,
-             height + 1,
-             str(height),
-             ha="center",
-             va="bottom")
-
-plt.tight_layout()
-plt.savefig("class_distribution.png")
-plt.show()
+def image_scores(detections, rules):
+    """Confidence of each image's most confident suspicious detection (0 if none)."""
+    scores = np.zeros(len(detections), dtype=np.float32)
+    dets = [d for d in detections if d is not None and len(d)]
+    if not dets:
+        return scores
+    owner = np.concatenate([np.full(len(d), i) for i, d in enumerate(detections) if d is not None and len(d)])
+    stacked = np.concatenate(dets)
+    mask = rules.suspicious[stacked[:, 5].astype(np.intp)]
+    np.maximum.at(scores, owner[mask], stacked[mask, 4])
+    return scores
+
+
+def confusion(y_true, y_pred):
+    """Confusion counts for one or many prediction rows: (tp, fp, fn, tn)."""
+    tp = (y_pred & y_true).sum(-1)
+    fp = (y_pred & ~y_true).sum(-1)
+    fn = y_true.sum() - tp
+    tn = (~y_true).sum() - fp
+    return tp, fp, fn, tn
+
+
+def metrics(y_true, y_pred):
+    """Accuracy, precision, recall and F1 for one or many prediction rows, vectorized."""
+    tp, fp, fn, tn = (np.asarray(c, dtype=np.float64) for c in confusion(y_true, y_pred))
+    precision = np.divide(tp, tp + fp, out=np.zeros_like(tp), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros_like(tp), where=(tp + fn) > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros_like(tp),
+                   where=(precision + recall) > 0)
+    accuracy = (tp + tn) / max(len(y_true), 1)
+    return {"accuracy": accuracy, "precision": precision, "recall": recall, "f1": f1}
+
+
+def sweep(scores, y_true, thresholds=SWEEP):
+    """Metrics for every threshold at once: one (thresholds x images) comparison."""
+    return metrics(y_true, scores[None, :] > np.asarray(thresholds)[:, None])
+
+
+# ---------------- PLOTS ----------------
+def plot_confusion_matrix(cm, path):
+    fig = plt.figure(figsize=(5, 4))
+    plt.imshow(cm, cmap="Blues")
+    plt.title("Confusion Matrix")
+    plt.colorbar()
+
+    plt.xticks([0, 1], ["Non-Cheating", "Cheating"])
+    plt.yticks([0, 1], ["Non-Cheating", "Cheating"])
+
+    for i in range(2):
+        for j in range(2):
+            plt.text(j, i, cm[i, j], ha="center", va="center", fontsize=12)
+
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_performance(result, path):
+    metric_values = [result[k] for k in ("accuracy", "precision", "recall", "f1")]
+    metric_labels = ["Accuracy", "Precision", "Recall", "F1-Score"]
+
+    fig = plt.figure(figsize=(6, 4))
+    plt.bar(metric_labels, metric_values)
+    plt.ylim(0, 1)
+    plt.title("Performance Metrics")
+
+    for i, v in enumerate(metric_values):
+        plt.text(i, v + 0.02, f"{v:.2f}", ha="center")
+
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_class_distribution(y_true, path):
+    labels = ["Cheating", "Non-Cheating"]
+    counts = [int(y_true.sum()), int((~y_true).sum())]
+
+    fig = plt.figure(figsize=(4, 6))
+    bars = plt.bar(labels, counts, color=["red", "green"])
+
+    plt.title("Test Dataset Class Distribution")
+    plt.xlabel("Class")
+    plt.ylabel("Number of Images")
+
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width() / 2, height + 1, str(height), ha="center", va="bottom")
+
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_sweep(thresholds, result, path):
+    fig = plt.figure(figsize=(6, 4))
+    for key, label in (("precision", "Precision"), ("recall", "Recall"), ("f1", "F1-Score")):
+        plt.plot(thresholds, result[key], marker="o", label=label)
+    plt.ylim(0, 1.05)
+    plt.xlabel("Confidence threshold")
+    plt.title("Threshold Sweep")
+    plt.legend()
+    plt.grid(alpha=0.3)
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--manifest", default=MANIFEST, help="split_dataset.py manifest to take the test split from")
+    parser.add_argument("--test-dir", default=None,
+                        help=f"read <dir>/{{cheating,non_cheating}} instead of the manifest "
+                             f"(default when no manifest exists: {os.path.relpath(TEST_DIR, BASE_DIR)})")
+    parser.add_argument("--backend", default="torch", choices=sorted(WEIGHTS))
+    parser.add_argument("--threads", type=int, default=None, help="inference threads")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--decoders", type=int, default=4, help="image decoding threads")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="report metrics at this score threshold instead of the app's DetectionRules")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--dataset-cache", nargs="?", const=os.path.join(DATASET_CACHE_DIR, "test"), default=None,
+                        help="read pre-decoded, letterboxed images from this dataset_cache.py directory "
+                             "(built or refreshed as needed)")
+    parser.add_argument("--out", default=".", help="directory for the plots")
+    args = parser.parse_args()
+
+    # split_dataset.py writes only the manifest by default; Dataset/test exists only with --mode *link
+    if args.test_dir is None and os.path.exists(args.manifest):
+        source = args.manifest
+        paths, y_true = read_manifest(args.manifest, "test")
+    else:
+        source = args.test_dir or TEST_DIR
+        if not os.path.isdir(source):
+            print(f"Neither {args.manifest} nor {source} exists; run split_dataset.py first")
+            return
+        paths, y_true = list_images(source)
+    if not paths:
+        print(f"No test images in {source}")
+        return
+
+    cache = PredictionCache(args.cache_dir, model_key(args.backend))
+    started = time.perf_counter()
+    if args.dataset_cache:
+        frames = cached_frames(ensure_cache(paths, y_true, args.dataset_cache), cache)
+    else:
+        frames = decoded_frames(paths, cache, args.decoders)
+    detections, inferred = predict(frames, args.backend, cache, args.batch, args.threads)
+    seconds = time.perf_counter() - started
+    print(f"{len(paths)} images in {seconds:.1f}s ({len(paths) / seconds:.1f} images/s), "
+          f"{inferred} inferred, {len(paths) - inferred} from cache")
+
+    readable = np.array([d is not None for d in detections])
+    detections = [d for d in detections if d is not None]
+    y_true = y_true[readable]
+    if not detections:
+        print("No readable images")
+        return
+    rules = DetectionRules(cache.names)
+
+    scores = image_scores(detections, rules)
+    if args.threshold is None:
+        y_pred = np.array([rules.evaluate(d).cheating for d in detections], dtype=bool)
+        setting = "app DetectionRules"
+    else:
+        y_pred = scores > args.threshold
+        setting = f"threshold {args.threshold:g}"
+    result = {k: float(v) for k, v in metrics(y_true, y_pred).items()}
+
+    print(f"\n📊 MODEL PERFORMANCE ({args.backend}, {setting})")
+    print(f"Accuracy  : {result['accuracy'] * 100:.2f}%")
+    print(f"Precision : {result['precision']:.2f}")
+    print(f"Recall    : {result['recall']:.2f}")
+    print(f"F1 Score  : {result['f1']:.2f}")
+
+    swept = sweep(scores, y_true)
+    print(f"\n{'threshold':>10}{'precision':>11}{'recall':>8}{'f1':>7}")
+    for i, t in enumerate(SWEEP):
+        print(f"{t:>10.2f}{swept['precision'][i]:>11.3f}{swept['recall'][i]:>8.3f}{swept['f1'][i]:>7.3f}")
+    best = int(np.argmax(swept["f1"]))
+    print(f"Best F1 {swept['f1'][best]:.3f} at threshold {SWEEP[best]:.2f}")
+
+    os.makedirs(args.out, exist_ok=True)
+    tp, fp, fn, tn = confusion(y_true, y_pred)
+    plot_confusion_matrix(np.array([[tn, fp], [fn, tp]]), os.path.join(args.out, "confusion_matrix.png"))
+    plot_performance(result, os.path.join(args.out, "performance_graph.png"))
+    plot_class_distribution(y_true, os.path.join(args.out, "class_distribution.png"))
+    plot_sweep(SWEEP, swept, os.path.join(args.out, "threshold_sweep.png"))
+
 
+if __name__ == "__main__":
+    main()
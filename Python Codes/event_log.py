@@ -0,0 +1,155 @@
+# event_log.py
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+
+from batch_inference import percentile
+
+_STOP = object()
+
+
+class EventWriter:
+    """
+    Background writer for per-student proctoring report lines.
+
+    Request handlers only enqueue; a single writer thread groups lines by
+    student and appends them to reports/user_<id>_report.txt once
+    flush_size lines are pending or flush_interval seconds have passed.
+    Structured events that come with a line are handed to the optional
+    sink (see proctoring_events.WriterEventSink) in one batch per flush.
+    When the queue is full, new lines are dropped and counted rather than
+    blocking the request. Pending lines are flushed on close() and at exit.
+    """
+
+    def __init__(self, reports_dir="reports", sink=None, max_queue=10000, flush_size=256,
+                 flush_interval=1.0, stats_window=1000):
+        self.reports_dir = reports_dir
+        self.sink = sink
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._flush_latencies = deque(maxlen=stats_window)
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.errors = 0
+        self._closed = False
+
+        os.makedirs(reports_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------------- PUBLIC API ----------------
+    def log(self, user_id, line, event=None):
+        """Queue one report line (without trailing newline) and optional event row; never blocks."""
+        try:
+            # Callers pass the id as int or str; one key per user keeps its lines in one group and one open()
+            self._queue.put_nowait((str(user_id), line, event))
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+
+    def flush(self, timeout=5):
+        """
+        Block until everything queued so far has been written; False if that
+        did not happen within timeout (including a queue too full to accept the marker).
+        """
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    def close(self, timeout=5):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def report_path(self, user_id):
+        return os.path.join(self.reports_dir, f"user_{user_id}_report.txt")
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = list(self._flush_latencies)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "flush_ms_p50": round(percentile(latencies, 50) * 1000, 2),
+                "flush_ms_p99": round(percentile(latencies, 99) * 1000, 2),
+            }
+
+    # ---------------- WORKER ----------------
+    def _run(self):
+        pending = defaultdict(list)
+        events = []
+        count = 0
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                user_id, line, event = item
+                pending[user_id].append(line)
+                if event is not None:
+                    events.append(event)
+                count += 1
+                if count < self.flush_size and time.monotonic() < deadline:
+                    continue
+
+            # Flush on size, on timeout, or when a flush()/close() marker arrives
+            if count:
+                self._write(pending, events)
+                pending = defaultdict(list)
+                events = []
+                count = 0
+            deadline = time.monotonic() + self.flush_interval
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                if self.sink is not None:
+                    self.sink.close()
+                return
+
+    def _write(self, pending, events):
+        start = time.perf_counter()
+        written = 0
+        for user_id, lines in pending.items():
+            try:
+                with open(self.report_path(user_id), "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                written += len(lines)
+            except OSError as err:
+                print("EVENT LOG ERROR:", err)
+                with self._stats_lock:
+                    self.errors += 1
+
+        if events and self.sink is not None:
+            try:
+                self.sink.insert(events)
+            except Exception as err:
+                print("EVENT LOG ERROR:", err)
+                with self._stats_lock:
+                    self.errors += 1
+
+        with self._stats_lock:
+            self.written += written
+            self.flushes += 1
+            self._flush_latencies.append(time.perf_counter() - start)
@@ -0,0 +1,103 @@
+# face_analysis.py
+import cv2
+import numpy as np
+
+from emotion_detection import classify_emotion
+from face_mesh_engine import FaceMeshEngine
+
+# One long-lived FaceMesh per exam session, so tracking state survives between frames
+face_mesh_engine = FaceMeshEngine(max_sessions=256, idle_timeout=300)
+
+# Only these FaceMesh landmarks are read; everything else stays inside MediaPipe
+NOSE_TIP = 1
+UPPER_LIP, LOWER_LIP = 13, 14
+LEFT_EYE_TOP, LEFT_EYE_BOTTOM = 159, 145
+RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM = 386, 374
+LEFT_BROW_OUTER, LEFT_BROW_INNER = 70, 63
+RIGHT_BROW_OUTER, RIGHT_BROW_INNER = 300, 293
+
+LANDMARK_IDS = (
+    NOSE_TIP, UPPER_LIP, LOWER_LIP,
+    LEFT_EYE_TOP, LEFT_EYE_BOTTOM, RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM,
+    LEFT_BROW_OUTER, LEFT_BROW_INNER, RIGHT_BROW_OUTER, RIGHT_BROW_INNER,
+)
+ROW = {landmark_id: row for row, landmark_id in enumerate(LANDMARK_IDS)}
+
+# Row pairs whose vertical distance gives eye, mouth and brow measurements
+EYE_TOPS = [ROW[LEFT_EYE_TOP], ROW[RIGHT_EYE_TOP]]
+EYE_BOTTOMS = [ROW[LEFT_EYE_BOTTOM], ROW[RIGHT_EYE_BOTTOM]]
+BROW_OUTERS = [ROW[LEFT_BROW_OUTER], ROW[RIGHT_BROW_OUTER]]
+BROW_INNERS = [ROW[LEFT_BROW_INNER], ROW[RIGHT_BROW_INNER]]
+
+BLINK_THRESHOLD = 0.01
+MOUTH_OPEN_THRESHOLD = 0.03
+HEAD_LOW, HEAD_HIGH = 0.4, 0.6
+
+NO_FACE = {
+    "blink": "No",
+    "mouth": "Closed",
+    "head_pose": "Center",
+    "emotion": "No Face",
+    "emotion_conf": 0,
+}
+
+
+def landmark_array(face_landmarks):
+    """(len(LANDMARK_IDS), 2) array of normalized x, y for the landmarks we use."""
+    lm = face_landmarks.landmark
+    return np.array([(lm[i].x, lm[i].y) for i in LANDMARK_IDS], dtype=np.float32)
+
+
+def head_pose_from_nose(x, y):
+    if x < HEAD_LOW:
+        return "Left"
+    if x > HEAD_HIGH:
+        return "Right"
+    if y < HEAD_LOW:
+        return "Up"
+    if y > HEAD_HIGH:
+        return "Down"
+    return "Center"
+
+
+def analyze_points(points):
+    """Blink, mouth, head pose and emotion from a landmark_array() result."""
+    ys = points[:, 1]
+
+    eyes = np.abs(ys[EYE_TOPS] - ys[EYE_BOTTOMS])
+    brows = ys[BROW_OUTERS] - ys[BROW_INNERS]
+    avg_eye = float(eyes.mean())
+    mouth_open = float(abs(ys[ROW[UPPER_LIP]] - ys[ROW[LOWER_LIP]]))
+    nose_x, nose_y = points[ROW[NOSE_TIP]]
+
+    emotion, emotion_conf = classify_emotion(avg_eye, mouth_open, float(brows[0]), float(brows[1]))
+
+    return {
+        "blink": "Yes" if eyes[0] < BLINK_THRESHOLD else "No",
+        "mouth": "Open" if mouth_open > MOUTH_OPEN_THRESHOLD else "Closed",
+        "head_pose": head_pose_from_nose(nose_x, nose_y),
+        "emotion": emotion,
+        "emotion_conf": int(emotion_conf),
+    }
+
+
+def extract_face(frame, session_id="default"):
+    """Run FaceMesh once on a BGR frame; returns the first face's landmarks or None."""
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    results = face_mesh_engine.process(session_id, rgb)
+    if not results.multi_face_landmarks:
+        return None
+    return results.multi_face_landmarks[0]
+
+
+def analyze_frame(frame, session_id="default"):
+    face_landmarks = extract_face(frame, session_id)
+    if face_landmarks is None:
+        return dict(NO_FACE)
+    return analyze_points(landmark_array(face_landmarks))
+
+
+def detect_emotion(frame, session_id="default"):
+    """Emotion-only view of analyze_frame(), for callers that need nothing else."""
+    face = analyze_frame(frame, session_id)
+    return face["emotion"], face["emotion_conf"]
@@ -0,0 +1,120 @@
+# face_mesh_engine.py
+import threading
+import time
+from collections import OrderedDict
+
+import mediapipe as mp
+
+mp_face_mesh = mp.solutions.face_mesh
+
+DEFAULT_OPTIONS = {
+    "static_image_mode": False,
+    "max_num_faces": 1,
+    "refine_landmarks": True,
+}
+
+
+class _Session:
+    __slots__ = ("mesh", "lock", "last_used", "closed")
+
+    def __init__(self):
+        self.mesh = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+
+
+class FaceMeshEngine:
+    """
+    Keeps one long-lived FaceMesh per exam session so that tracking mode
+    (static_image_mode=False) carries over between consecutive frames.
+    Sessions live in an LRU pool of at most max_sessions entries; sessions
+    idle for longer than idle_timeout seconds are closed on the next access.
+    """
+
+    def __init__(self, max_sessions=64, idle_timeout=300, **options):
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_timeout = idle_timeout
+        self.options = dict(DEFAULT_OPTIONS, **options)
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def process(self, session_id, rgb):
+        """Run FaceMesh on an RGB frame using the session's own landmarker."""
+        while True:
+            entry = self._acquire(session_id)
+            with entry.lock:
+                # Evicted between lookup and lock: start over with a fresh entry
+                if entry.closed:
+                    continue
+                if entry.mesh is None:
+                    entry.mesh = mp_face_mesh.FaceMesh(**self.options)
+                    with self._lock:
+                        self.created += 1
+                return entry.mesh.process(rgb)
+
+    def close_session(self, session_id):
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._close(entry)
+
+    def close(self):
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "created": self.created,
+                "evicted": self.evicted,
+            }
+
+    # ---------------- POOL HELPERS ----------------
+    def _acquire(self, session_id):
+        now = time.monotonic()
+        stale = []
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = _Session()
+                self._sessions[session_id] = entry
+            else:
+                self._sessions.move_to_end(session_id)
+            entry.last_used = now
+
+            # Oldest entries sit at the front of the OrderedDict
+            for key, other in self._sessions.items():
+                if key == session_id:
+                    continue
+                if len(self._sessions) - len(stale) > self.max_sessions:
+                    stale.append(key)
+                elif self.idle_timeout and now - other.last_used > self.idle_timeout:
+                    stale.append(key)
+                else:
+                    break
+
+            stale_entries = [self._sessions.pop(key) for key in stale]
+            self.evicted += len(stale_entries)
+
+        # Closing waits for any in-flight process() on that session, so do it outside the pool lock
+        for other in stale_entries:
+            self._close(other)
+        return entry
+
+    @staticmethod
+    def _close(entry):
+        with entry.lock:
+            entry.closed = True
+            if entry.mesh is not None:
+                entry.mesh.close()
+                entry.mesh = None
@@ -0,0 +1,89 @@
+# frame_gate.py
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+# Thumbnails are compared in grayscale at this size, whatever the capture size is
+THUMB_SIZE = (32, 24)
+# Mean absolute difference in gray levels (0-255) below which a frame counts as unchanged
+CHANGE_THRESHOLD = 4.0
+# Even an unchanged scene is fully re-analyzed at least this often
+MAX_CACHE_AGE_SECONDS = 15
+
+
+class FrameChangeGate:
+    """
+    Per-session change detector that lets near-identical webcam frames skip
+    YOLO and FaceMesh. Each frame is shrunk to a small grayscale thumbnail
+    and compared with the thumbnail of the last fully analyzed frame.
+    """
+
+    def __init__(self, threshold=CHANGE_THRESHOLD, max_age=MAX_CACHE_AGE_SECONDS,
+                 thumb_size=THUMB_SIZE, max_sessions=10000):
+        self.threshold = threshold
+        self.max_age = max_age
+        self.thumb_size = thumb_size
+        self.max_sessions = max_sessions
+
+        self._sessions = OrderedDict()  # user_id -> (thumbnail, verdict, analyzed_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA)
+
+    def lookup(self, user_id, frame):
+        """
+        Returns (thumbnail, cached_verdict). cached_verdict is None when the
+        frame must be analyzed; pass the thumbnail to store() afterwards.
+        """
+        thumb = self.thumbnail(frame)
+
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return thumb, None
+
+            last_thumb, verdict, analyzed_at = entry
+            if time.monotonic() - analyzed_at > self.max_age:
+                self.expired += 1
+                self.misses += 1
+                return thumb, None
+
+        change = cv2.mean(cv2.absdiff(thumb, last_thumb))[0]
+        with self._lock:
+            if change < self.threshold:
+                self.hits += 1
+                return thumb, verdict
+            self.misses += 1
+        return thumb, None
+
+    def store(self, user_id, thumb, verdict):
+        with self._lock:
+            self._sessions[user_id] = (thumb, verdict, time.monotonic())
+            self._sessions.move_to_end(user_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "threshold": self.threshold,
+                "max_age_seconds": self.max_age,
+            }
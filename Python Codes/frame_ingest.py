@@ -0,0 +1,73 @@
+# frame_ingest.py
+import base64
+import binascii
+
+import cv2
+import numpy as np
+
+# YOLOv5 letterboxes to 640 on the long side; decoding above that is wasted work
+MODEL_INPUT_SIZE = 640
+
+REDUCED_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+# Start-of-frame markers carry the image size; C4/C8/CC are other segment types
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(buf):
+    """(width, height) from a JPEG header without decoding, or None if not found."""
+    view = memoryview(buf)
+    if len(view) < 4 or view[0] != 0xFF or view[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 < len(view):
+        if view[i] != 0xFF:
+            return None
+        marker = view[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in SOF_MARKERS:
+            height = (view[i + 5] << 8) | view[i + 6]
+            width = (view[i + 7] << 8) | view[i + 8]
+            return width, height
+        i += 2 + ((view[i + 2] << 8) | view[i + 3])
+    return None
+
+
+def decode_flag(buf, min_side=MODEL_INPUT_SIZE):
+    """Largest IMREAD_REDUCED_* scale that still leaves the long side >= min_side."""
+    size = jpeg_size(buf)
+    if size is None or not min_side:
+        return cv2.IMREAD_COLOR
+
+    long_side = max(size)
+    for factor, flag in REDUCED_FLAGS:
+        if long_side // factor >= min_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_jpeg(buf, min_side=MODEL_INPUT_SIZE):
+    """
+    Decode raw JPEG bytes straight from the request buffer.
+    np.frombuffer wraps the bytes without copying them.
+    Returns None for empty or undecodable input.
+    """
+    if not buf:
+        return None
+    return cv2.imdecode(np.frombuffer(buf, np.uint8), decode_flag(buf, min_side))
+
+
+def decode_data_url(data_url, min_side=MODEL_INPUT_SIZE):
+    """Decode a canvas.toDataURL('image/jpeg') string (legacy JSON route)."""
+    try:
+        raw = base64.b64decode(data_url.split(",", 1)[1])
+    except (AttributeError, IndexError, ValueError, binascii.Error):
+        return None
+    return decode_jpeg(raw, min_side)
@@ -0,0 +1,293 @@
+# inference_backend.py
+"""
+Interchangeable CPU inference backends for the yolov5s detector.
+
+Every backend is called like the hub model, backend(frame) or
+backend([frames]), and returns an object whose .xyxy holds one
+(N, 6) float32 array (x1, y1, x2, y2, confidence, class) per frame in
+that frame's own pixel coordinates, plus .names. DetectionRules,
+BatchInferenceScheduler and the detection scripts therefore work with
+any of them.
+
+  torch - the eager PyTorch hub model (model_manager.load_yolov5)
+  onnx  - ONNX Runtime on an exported graph, with letterbox + NMS in numpy
+
+Export and (optionally) quantize the ONNX graph once:
+
+    python models/yolov5/export.py --weights models/yolov5s.pt --include onnx --dynamic
+    python inference_backend.py quantize --mode dynamic
+    python inference_backend.py quantize --mode static --calibration ../Dataset/DataSets
+"""
+import argparse
+import ast
+import glob
+import os
+import random
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from model_manager import BASE_DIR, load_yolov5
+
+ONNX_MODEL = os.path.join(BASE_DIR, "models", "yolov5s.onnx")
+ONNX_INT8_MODEL = os.path.join(BASE_DIR, "models", "yolov5s.int8.onnx")
+
+INPUT_SIZE = 640
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.45
+MAX_DETECTIONS = 300
+PAD_VALUE = 114
+
+Detections = namedtuple("Detections", ["xyxy", "names"])
+
+
+def _as_batch(frames):
+    return [frames] if isinstance(frames, np.ndarray) and frames.ndim == 3 else list(frames)
+
+
+# ---------------- PYTORCH ----------------
+class TorchBackend:
+    """The hub model in eager mode; results are moved to numpy so every backend looks the same."""
+
+    name = "torch"
+
+    def __init__(self, model=None, threads=None):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        self._torch = torch
+        self.model = model if model is not None else load_yolov5()
+        self.names = self.model.names
+
+    def __call__(self, frames):
+        with self._torch.inference_mode():
+            results = self.model(_as_batch(frames))
+        return Detections([det.cpu().numpy() for det in results.xyxy], self.names)
+
+    def info(self):
+        return {
+            "backend": self.name,
+            "torch": self._torch.__version__,
+            "device": "cpu",
+            "threads": self._torch.get_num_threads(),
+        }
+
+
+# ---------------- ONNX RUNTIME ----------------
+def letterbox(frame, size=INPUT_SIZE):
+    """Resize keeping aspect ratio and pad to size x size; returns (image, ratio, (pad_x, pad_y))."""
+    h, w = frame.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = round(w * ratio), round(h * ratio)
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = round(pad_y - 0.1), round(pad_y + 0.1)
+    left, right = round(pad_x - 0.1), round(pad_x + 0.1)
+    image = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                               value=(PAD_VALUE, PAD_VALUE, PAD_VALUE))
+    return image, ratio, (left, top)
+
+
+def to_tensor(images):
+    """Letterboxed HWC uint8 images -> NCHW float32 in [0, 1]."""
+    batch = np.stack(images).transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression; returns kept indices, highest score first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.intp)
+
+
+def postprocess(pred, ratio, pad, shape, conf_threshold=CONF_THRESHOLD, iou_threshold=IOU_THRESHOLD,
+                max_det=MAX_DETECTIONS):
+    """
+    One image's raw yolov5 output (rows of cx, cy, w, h, objectness, class scores...)
+    -> (N, 6) detections in the original frame's coordinates.
+    """
+    pred = pred[pred[:, 4] > conf_threshold]
+    if not len(pred):
+        return np.zeros((0, 6), dtype=np.float32)
+
+    class_scores = pred[:, 5:] * pred[:, 4:5]
+    cls = class_scores.argmax(1)
+    conf = class_scores[np.arange(len(cls)), cls]
+    mask = conf > conf_threshold
+    pred, cls, conf = pred[mask], cls[mask], conf[mask]
+    if not len(pred):
+        return np.zeros((0, 6), dtype=np.float32)
+
+    boxes = np.empty((len(pred), 4), dtype=np.float32)
+    boxes[:, :2] = pred[:, :2] - pred[:, 2:4] / 2
+    boxes[:, 2:] = pred[:, :2] + pred[:, 2:4] / 2
+
+    # Offsetting boxes by class keeps NMS per class in a single pass, as yolov5 does
+    keep = nms(boxes + cls[:, None] * 4096.0, conf, iou_threshold)[:max_det]
+    boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+    return np.column_stack([boxes, conf, cls]).astype(np.float32)
+
+
+class OnnxBackend:
+    """
+    yolov5s exported to ONNX, run by ONNX Runtime on CPU.
+
+    Frames are passed through unchanged, exactly as the hub model receives
+    them, so both backends see the same pixels. Graphs exported without
+    --dynamic have a fixed batch of 1 and are run frame by frame.
+    """
+
+    name = "onnx"
+
+    def __init__(self, path=ONNX_MODEL, threads=None, names=None, input_size=INPUT_SIZE,
+                 conf_threshold=CONF_THRESHOLD, iou_threshold=IOU_THRESHOLD):
+        import onnxruntime as ort
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found (see inference_backend.py for export)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self._ort = ort
+        self.path = path
+        self.threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.input_size = input_size
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+
+        if names is None:
+            meta = self.session.get_modelmeta().custom_metadata_map
+            names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        self.names = names
+
+    def __call__(self, frames):
+        frames = _as_batch(frames)
+        boxed = [letterbox(frame, self.input_size) for frame in frames]
+        tensor = to_tensor([image for image, _, _ in boxed])
+
+        if self.dynamic_batch:
+            preds = self.session.run(None, {self.input_name: tensor})[0]
+        else:
+            preds = np.concatenate([self.session.run(None, {self.input_name: tensor[i:i + 1]})[0]
+                                    for i in range(len(frames))])
+
+        return Detections([
+            postprocess(pred, ratio, pad, frame.shape, self.conf_threshold, self.iou_threshold)
+            for pred, frame, (_, ratio, pad) in zip(preds, frames, boxed)
+        ], self.names)
+
+    def info(self):
+        return {
+            "backend": self.name,
+            "onnxruntime": self._ort.__version__,
+            "model": os.path.basename(self.path),
+            "dynamic_batch": self.dynamic_batch,
+            "threads": self.threads or "default",
+        }
+
+
+# ---------------- FACTORY ----------------
+BACKENDS = {
+    "torch": lambda threads: TorchBackend(threads=threads),
+    "onnx": lambda threads: OnnxBackend(ONNX_MODEL, threads),
+    "onnx-int8": lambda threads: OnnxBackend(ONNX_INT8_MODEL, threads),
+}
+
+
+def load_backend(name="torch", threads=None):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name](threads)
+
+
+# ---------------- QUANTIZATION ----------------
+class LetterboxCalibrationReader:
+    """Feeds letterboxed images to onnxruntime's static quantizer, one at a time."""
+
+    def __init__(self, input_name, paths, input_size=INPUT_SIZE):
+        self.input_name = input_name
+        self.input_size = input_size
+        self._paths = iter(paths)
+
+    def get_next(self):
+        for path in self._paths:
+            frame = cv2.imread(path)
+            if frame is not None:
+                image, _, _ = letterbox(frame, self.input_size)
+                return {self.input_name: to_tensor([image])}
+        return None
+
+
+def quantize_onnx(src=ONNX_MODEL, dst=ONNX_INT8_MODEL, mode="dynamic", calibration_dir=None,
+                  calibration_images=100, seed=0):
+    """Write an INT8 copy of src: dynamic (weights only) or static (calibrated on sample images)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic, quantize_static
+
+    if mode == "dynamic":
+        quantize_dynamic(src, dst, weight_type=QuantType.QUInt8)
+        return dst
+
+    import onnxruntime as ort
+
+    paths = sorted(glob.glob(os.path.join(calibration_dir, "**", "*.*"), recursive=True))
+    paths = [p for p in paths if p.lower().endswith((".jpg", ".jpeg", ".png"))]
+    if not paths:
+        raise FileNotFoundError(f"No calibration images under {calibration_dir}")
+    random.Random(seed).shuffle(paths)
+
+    input_name = ort.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = LetterboxCalibrationReader(input_name, paths[:calibration_images])
+    quantize_static(src, dst, reader, weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+    return dst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    q = sub.add_parser("quantize", help="write an INT8 copy of the exported ONNX graph")
+    q.add_argument("--src", default=ONNX_MODEL)
+    q.add_argument("--dst", default=ONNX_INT8_MODEL)
+    q.add_argument("--mode", choices=("dynamic", "static"), default="dynamic")
+    q.add_argument("--calibration", default=os.path.join(BASE_DIR, "..", "Dataset", "DataSets"))
+    q.add_argument("--calibration-images", type=int, default=100)
+    args = parser.parse_args()
+
+    dst = quantize_onnx(args.src, args.dst, args.mode, args.calibration, args.calibration_images)
+    print(f"{args.mode} INT8 model written to {dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+# inference_pool.py
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch_inference import percentile
+
+# Largest frame a slot holds; decode_jpeg already shrinks uploads towards MODEL_INPUT_SIZE
+MAX_FRAME_SHAPE = (720, 1280, 3)
+
+
+class PoolBusy(Exception):
+    """Every frame slot is in use (or no worker is ready); the caller should drop or retry the frame."""
+
+
+class WorkerCrashed(Exception):
+    """The worker holding this frame died or hung and was restarted."""
+
+
+class InvalidFrame(ValueError):
+    """The frame can never be analyzed: not uint8, or bigger than a shared-memory slot."""
+
+
+# ---------------- WORKER PROCESS ----------------
+def _pin_threads(threads, cpus):
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except ImportError:
+        pass
+
+
+def _worker_main(worker_id, backend_name, threads, cpus, shm_name, slot_bytes, tasks, results, max_batch):
+    _pin_threads(threads, cpus)
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    from inference_backend import load_backend
+    try:
+        backend = load_backend(backend_name, threads)
+    except Exception as err:
+        results.put(("failed", worker_id, f"{type(err).__name__}: {err}"))
+        return
+    names = backend.names
+    results.put(("ready", worker_id, dict(names) if isinstance(names, dict) else dict(enumerate(names))))
+
+    analyze_frame = face_mesh_engine = None
+    jobs = frame = None
+    stopping = False
+    while not stopping:
+        try:
+            task = tasks.get(timeout=1.0)
+        except queue.Empty:
+            results.put(("heartbeat", worker_id, None))
+            continue
+        if task is None:
+            break
+
+        batch = [task]
+        while len(batch) < max_batch:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                stopping = True
+                break
+            batch.append(task)
+
+        if any(t[0] == "close" or t[4] is not None for t in batch) and analyze_frame is None:
+            from face_analysis import analyze_frame, face_mesh_engine
+
+        jobs = []
+        for kind, job_id, slot, shape, session_id in batch:
+            if kind == "close":
+                face_mesh_engine.close_session(session_id)
+            else:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                jobs.append((job_id, frame, session_id))
+        if not jobs:
+            continue
+
+        try:
+            detections = backend([frame for _, frame, _ in jobs]).xyxy
+            for (job_id, frame, session_id), det in zip(jobs, detections):
+                face = analyze_frame(frame, session_id=session_id) if session_id is not None else None
+                results.put(("done", worker_id, (job_id, np.asarray(det, dtype=np.float32), face, None)))
+        except Exception as err:
+            for job_id, _, _ in jobs:
+                results.put(("done", worker_id, (job_id, None, None, f"{type(err).__name__}: {err}")))
+        # Drop the views into shared memory before the slot is reused (and before shm.close())
+        jobs = frame = None
+
+    shm.close()
+
+
+# ---------------- POOL ----------------
+class _Worker:
+    def __init__(self, worker_id, cpus):
+        self.id = worker_id
+        self.cpus = cpus
+        self.process = None
+        self.tasks = None
+        self.ready = False
+        self.failed = None
+        self.inflight = 0
+        self.restarts = 0
+        self.last_seen = time.monotonic()
+
+
+class InferencePool:
+    """
+    YOLOv5 (and optionally FaceMesh) in separate worker processes.
+
+    Each worker loads its own backend with pinned thread counts (and, on
+    Linux, its own CPU cores), so inference no longer shares the web
+    process's GIL. Frames are copied once into a shared-memory slot; only
+    (job, slot, shape) crosses the queue, and each worker batches whatever
+    is waiting. When every slot is taken submit() raises PoolBusy instead
+    of queueing without bound.
+
+    Frames with a session id also go through FaceMesh in the worker, and
+    a session always maps to the same worker so its landmark tracking
+    continues. A monitor thread restarts workers that exit or hold a job
+    longer than job_timeout; their in-flight frames fail with WorkerCrashed.
+
+    on_ready(pool) runs once on the collector thread when the first worker
+    has its model; pool.names is set by then.
+    """
+
+    def __init__(self, backend="torch", workers=2, threads=1, slots_per_worker=4, max_batch=8,
+                 max_frame_shape=MAX_FRAME_SHAPE, job_timeout=10.0, pin_cpus=True, on_ready=None,
+                 stats_window=1000):
+        self.backend = backend
+        self.threads = threads
+        self.max_batch = max_batch
+        self.job_timeout = job_timeout
+        self.on_ready = on_ready
+        self.names = None
+
+        # spawn, not fork: the web process already runs threads that a fork would copy mid-flight
+        self._ctx = mp.get_context("spawn")
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.slots = workers * slots_per_worker
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots)
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._next_job = 0
+        self._latencies = deque(maxlen=stats_window)
+        self.completed = 0
+        self.rejected = 0
+        self.crashed = 0
+        self._closed = False
+
+        cores = os.cpu_count() or 1
+        self._workers = []
+        for i in range(workers):
+            cpus = {(i * threads + n) % cores for n in range(threads)} if pin_cpus else None
+            self._workers.append(_Worker(i, cpus))
+
+        self._results = self._ctx.Queue()
+        for worker in self._workers:
+            self._start(worker)
+
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._watch, name="inference-monitor", daemon=True)
+        self._monitor.start()
+
+    # ---------------- PUBLIC API ----------------
+    def submit(self, frame, session_id=None):
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise InvalidFrame(f"Frame {frame.shape} {frame.dtype} does not fit a {self.slot_bytes}-byte slot")
+
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy("all frame slots in use")
+
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        del view
+
+        with self._lock:
+            worker = self._pick(session_id)
+            if worker is None:
+                self._free.put(slot)
+                self.rejected += 1
+                raise PoolBusy("no inference worker ready")
+            job_id = self._next_job
+            self._next_job += 1
+            future = Future()
+            self._jobs[job_id] = (worker.id, future, slot, time.monotonic())
+            worker.inflight += 1
+            tasks = worker.tasks
+
+        tasks.put(("infer", job_id, slot, frame.shape, None if session_id is None else str(session_id)))
+        return future
+
+    def infer(self, frame, session_id=None, timeout=30):
+        """(detections, face) for one frame; face is None without a session_id."""
+        return self.submit(frame, session_id).result(timeout)
+
+    def close_session(self, session_id):
+        with self._lock:
+            worker = self._pick(session_id)
+        if worker is not None:
+            worker.tasks.put(("close", None, None, None, str(session_id)))
+
+    def queue_depth(self):
+        return self.slots - self._free.qsize()
+
+    def is_ready(self):
+        return any(w.ready for w in self._workers)
+
+    @property
+    def state(self):
+        if self.is_ready():
+            return "ready"
+        if all(w.failed for w in self._workers):
+            return "failed"
+        return "loading"
+
+    def health(self):
+        errors = {w.id: w.failed for w in self._workers if w.failed}
+        return {
+            "state": self.state,
+            "backend": self.backend,
+            "threads_per_worker": self.threads,
+            "workers_ready": sum(w.ready for w in self._workers),
+            "workers": len(self._workers),
+            "error": errors or None,
+        }
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "queue_depth": self.queue_depth(),
+                "slots": self.slots,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "crashed": self.crashed,
+                "latency_ms_p50": round(percentile(latencies, 50) * 1000, 2),
+                "latency_ms_p99": round(percentile(latencies, 99) * 1000, 2),
+                "workers": [{
+                    "pid": w.process.pid if w.process else None,
+                    "ready": w.ready,
+                    "inflight": w.inflight,
+                    "restarts": w.restarts,
+                } for w in self._workers],
+            }
+
+    def close(self, timeout=5):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._results.put(None)
+        self._collector.join(timeout)
+        self._shm.close()
+        self._shm.unlink()
+
+    # ---------------- INTERNALS ----------------
+    def _start(self, worker):
+        worker.tasks = self._ctx.Queue()
+        worker.ready = False
+        worker.last_seen = time.monotonic()
+        worker.process = self._ctx.Process(
+            target=_worker_main, name=f"inference-{worker.id}", daemon=True,
+            args=(worker.id, self.backend, self.threads, worker.cpus, self._shm.name, self.slot_bytes,
+                  worker.tasks, self._results, self.max_batch)
+        )
+        worker.process.start()
+
+    def _pick(self, session_id):
+        ready = [w for w in self._workers if w.ready]
+        if not ready:
+            return None
+        if session_id is not None:
+            # Same session, same worker: FaceMesh keeps tracking its face between frames
+            preferred = self._workers[zlib.crc32(str(session_id).encode()) % len(self._workers)]
+            if preferred.ready:
+                return preferred
+        return min(ready, key=lambda w: w.inflight)
+
+    def _collect(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            kind, worker_id, payload = message
+            worker = self._workers[worker_id]
+            worker.last_seen = time.monotonic()
+
+            if kind == "ready":
+                first = self.names is None
+                self.names = payload
+                worker.ready, worker.failed = True, None
+                if first and self.on_ready is not None:
+                    self.on_ready(self)
+            elif kind == "failed":
+                worker.failed = payload
+                print(f"INFERENCE WORKER {worker_id} FAILED:", payload)
+            elif kind == "done":
+                self._finish(worker, *payload)
+
+    def _finish(self, worker, job_id, detections, face, error):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            _, future, slot, submitted = job
+            worker.inflight -= 1
+            self.completed += 1
+            self._latencies.append(time.monotonic() - submitted)
+        self._free.put(slot)
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result((detections, face))
+
+    def _watch(self):
+        while not self._closed:
+            time.sleep(1.0)
+            now = time.monotonic()
+            for worker in self._workers:
+                if self._closed or worker.failed:
+                    continue
+                with self._lock:
+                    oldest = min((t for w, _, _, t in self._jobs.values() if w == worker.id), default=now)
+                if not worker.process.is_alive():
+                    if worker.process.exitcode == 0:
+                        continue  # clean exit only follows a failed load, reported as "failed"
+                    self._restart(worker, f"exited with code {worker.process.exitcode}")
+                elif now - oldest > self.job_timeout:
+                    worker.process.terminate()
+                    worker.process.join(1)
+                    self._restart(worker, f"no result for {self.job_timeout:g}s")
+
+    def _restart(self, worker, reason):
+        print(f"INFERENCE WORKER {worker.id} RESTARTING:", reason)
+        with self._lock:
+            lost = [(job_id, job) for job_id, job in self._jobs.items() if job[0] == worker.id]
+            for job_id, _ in lost:
+                del self._jobs[job_id]
+            self.crashed += len(lost)
+            worker.inflight = 0
+            worker.ready = False
+            worker.restarts += 1
+        for _, (_, future, slot, _) in lost:
+            self._free.put(slot)
+            future.set_exception(WorkerCrashed(reason))
+        self._start(worker)
@@ -0,0 +1,239 @@
+# migrations.py
+"""
+Versioned schema migrations, tracked in PRAGMA user_version.
+
+Each migration is a list of statements that runs in one transaction
+together with the user_version bump, so a database is always at a whole
+version. app.py applies pending migrations at startup; database.py runs
+them too before seeding sample questions.
+
+    python migrations.py            # migrate exam_system.db
+    python migrations.py --check    # migrate, then verify the hot queries use their indexes
+"""
+import argparse
+import os
+import sys
+
+from db_pool import connect
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "exam_system.db")
+
+# (version, description, statements) in ascending version order; never edit an applied entry, append a new one
+MIGRATIONS = [
+    (1, "base schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT,
+            role TEXT CHECK(role IN ('admin', 'student'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS subjects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE
+        )
+        """,
+        "INSERT OR IGNORE INTO subjects (name) VALUES ('Aptitude'), ('English'), ('Maths'), ('Programming')",
+        """
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject_id INTEGER,
+            question TEXT,
+            option1 TEXT,
+            option2 TEXT,
+            option3 TEXT,
+            option4 TEXT,
+            correct_answer INTEGER,
+            FOREIGN KEY(subject_id) REFERENCES subjects(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS exam_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            subject_id INTEGER,
+            score INTEGER,
+            total INTEGER,
+            time_taken TEXT,
+            date_taken TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id),
+            FOREIGN KEY(subject_id) REFERENCES subjects(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS exam_answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exam_result_id INTEGER,
+            question_id INTEGER,
+            selected_option INTEGER,
+            correct_option INTEGER,
+            is_correct INTEGER,
+            FOREIGN KEY(exam_result_id) REFERENCES exam_results(id),
+            FOREIGN KEY(question_id) REFERENCES questions(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            score INTEGER,
+            total INTEGER,
+            percentage REAL,
+            certificate_type TEXT,
+            created_at TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+    ]),
+    (2, "proctoring events", [
+        """
+        CREATE TABLE IF NOT EXISTS proctoring_events (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            session_id TEXT,
+            ts REAL NOT NULL,
+            event_type TEXT NOT NULL,
+            object_label TEXT,
+            confidence REAL,
+            emotion TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_events_user_ts ON proctoring_events(user_id, ts)",
+        "CREATE INDEX IF NOT EXISTS idx_events_type_ts ON proctoring_events(event_type, ts)",
+    ]),
+    (3, "hot-path indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_questions_subject_id ON questions(subject_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_exam_results_user_subject ON exam_results(user_id, subject_id)",
+        "CREATE INDEX IF NOT EXISTS idx_results_user_id ON results(user_id, id)",
+    ]),
+    # Bumped by triggers in the same transaction as any question/subject write, whoever makes it,
+    # so app.py's QuestionBank notices imports run from the command line
+    (4, "question bank version", [
+        """
+        CREATE TABLE IF NOT EXISTS question_bank_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO question_bank_version (id, version) VALUES (1, 0)",
+    ] + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS bump_bank_on_{table}_{op.lower()} AFTER {op} ON {table}
+        BEGIN
+            UPDATE question_bank_version SET version = version + 1 WHERE id = 1;
+        END
+        """
+        for table in ("questions", "subjects") for op in ("INSERT", "UPDATE", "DELETE")
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Every per-request query in app.py (and the modules it calls) with the index it must use
+HOT_QUERIES = [
+    ("login", "users", "sqlite_autoindex_users_1",
+     "SELECT * FROM users WHERE username=?", ("alice",)),
+    ("exam questions", "q", "idx_questions_subject_id",
+     """SELECT q.*, s.name AS subject_name FROM questions q JOIN subjects s ON q.subject_id = s.id
+        WHERE q.subject_id=? ORDER BY q.id""", (1,)),
+    ("admin page", "questions", "idx_questions_subject_id",
+     "SELECT id, subject_id, question, correct_answer FROM questions WHERE subject_id = ? AND id < ?"
+     " ORDER BY id DESC LIMIT ?", (1, 1000, 50)),
+    ("result subjects", "e", "idx_exam_results_user_subject",
+     """SELECT s.name AS subject_name, e.score, e.total FROM exam_results e
+        JOIN subjects s ON s.id = e.subject_id WHERE e.user_id = ? GROUP BY s.id ORDER BY s.id""", (1,)),
+    ("result saved", "results", "idx_results_user_id",
+     "SELECT id FROM results WHERE user_id = ?", (1,)),
+    ("certificate score", "results", "idx_results_user_id",
+     "SELECT percentage FROM results WHERE user_id = ? ORDER BY id DESC LIMIT 1", (1,)),
+    ("event timeline", "proctoring_events", "idx_events_user_ts",
+     """SELECT id, session_id, ts, event_type, object_label, confidence, emotion FROM proctoring_events
+        WHERE user_id = ? AND (ts < ? OR (ts = ? AND id < ?)) ORDER BY ts DESC, id DESC LIMIT ?""",
+     (1, 0.0, 0.0, 0, 50)),
+    ("event counts", "proctoring_events", "idx_events_user_ts",
+     "SELECT event_type, COUNT(*) AS total FROM proctoring_events WHERE user_id = ? AND ts >= ?"
+     " GROUP BY event_type", (1, 0.0)),
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Apply pending migrations on an autocommit connection; returns (old, new) version.
+
+    Each version runs under BEGIN IMMEDIATE and re-reads user_version, so
+    two processes starting at once apply it exactly once.
+    """
+    start = schema_version(conn)
+    for version, description, statements in MIGRATIONS:
+        if version <= start:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) >= version:
+                conn.execute("ROLLBACK")
+                continue
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"Migrated schema to version {version}: {description}")
+    return start, schema_version(conn)
+
+
+def apply_migrations(db_path=DB_PATH):
+    conn = connect(db_path, autocommit=True)
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+def query_plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def check_query_plans(conn):
+    """Returns (name, plan) for every hot query that scans its table or misses its index."""
+    failures = []
+    for name, table, index, sql, params in HOT_QUERIES:
+        plan = query_plan(conn, sql, params)
+        on_table = [step for step in plan if step.split(" ")[1:2] == [table]]
+        uses_index = any(f"INDEX {index}" in step for step in on_table)
+        scans = any(step.startswith("SCAN") and "INDEX" not in step for step in on_table)
+        if scans or not uses_index:
+            failures.append((name, plan))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--check", action="store_true", help="verify hot queries with EXPLAIN QUERY PLAN")
+    args = parser.parse_args()
+
+    old, new = apply_migrations(args.db)
+    print(f"Schema version {old} -> {new} (latest {SCHEMA_VERSION})")
+
+    if args.check:
+        conn = connect(args.db)
+        failures = check_query_plans(conn)
+        conn.close()
+        for name, plan in failures:
+            print(f"FAIL {name}: {' | '.join(plan)}")
+        print(f"{len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} hot queries use their index")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
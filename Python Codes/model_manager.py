@@ -0,0 +1,124 @@
+# model_manager.py
+"""
+Loads the YOLOv5 detector from local files, off the request path.
+
+Nothing is fetched from the network. The model is built from a local
+checkout of ultralytics/yolov5 and a local weights file:
+
+    git clone https://github.com/ultralytics/yolov5 "Python Codes/models/yolov5"
+    curl -L -o "Python Codes/models/yolov5s.pt" \\
+        https://github.com/ultralytics/yolov5/releases/download/v7.0/yolov5s.pt
+
+ModelManager loads in a background thread (or lazily on first use), runs
+a few warm-up inferences on synthetic frames so the first real frame
+doesn't pay for the cold start, and reports its state for /ready. The
+loader can return any inference_backend backend instead of the hub model.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+YOLO_REPO_DIR = os.path.join(BASE_DIR, "models", "yolov5")
+YOLO_WEIGHTS = os.path.join(BASE_DIR, "models", "yolov5s.pt")
+
+WARMUP_FRAMES = 3
+WARMUP_SHAPE = (480, 640, 3)
+
+
+def load_yolov5(repo_dir=YOLO_REPO_DIR, weights=YOLO_WEIGHTS):
+    """Build yolov5s from the local checkout and weights; raises FileNotFoundError if either is missing."""
+    import torch
+
+    for path in (repo_dir, weights):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found (see model_manager.py for setup)")
+    return torch.hub.load(repo_dir, "custom", path=weights, source="local")
+
+
+class ModelManager:
+    """
+    Owns the detector's lifecycle: idle -> loading -> ready | failed.
+
+    start() loads in a daemon thread so Flask serves other routes at
+    once; get() starts the load on first use when nobody called start().
+    on_ready(model) runs once on the loading thread after warm-up, e.g.
+    to build the batch scheduler. A failed load is kept in health()
+    rather than swallowed.
+    """
+
+    def __init__(self, loader=load_yolov5, on_ready=None, warmup_frames=WARMUP_FRAMES,
+                 warmup_shape=WARMUP_SHAPE):
+        self.loader = loader
+        self.on_ready = on_ready
+        self.warmup_frames = warmup_frames
+        self.warmup_shape = warmup_shape
+
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self.model = None
+        self.state = "idle"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_ms = None
+
+    # ---------------- PUBLIC API ----------------
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "loading"
+            self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def get(self, timeout=0):
+        """The model when ready, else None; waits up to timeout seconds for a load in progress."""
+        self.start()
+        self._ready.wait(timeout)
+        return self.model
+
+    def wait_ready(self, timeout=None):
+        self.start()
+        return self._ready.wait(timeout) and self.state == "ready"
+
+    def is_ready(self):
+        return self.state == "ready"
+
+    def health(self):
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_ms": self.warmup_ms,
+            # Backends from inference_backend describe themselves (name, runtime version, threads)
+            **(self.model.info() if hasattr(self.model, "info") else {}),
+        }
+
+    # ---------------- WORKER ----------------
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            model = self.loader()
+            self.load_seconds = round(time.perf_counter() - started, 2)
+
+            frame = np.random.default_rng(0).integers(0, 256, self.warmup_shape, dtype=np.uint8)
+            timings = []
+            for _ in range(self.warmup_frames):
+                t0 = time.perf_counter()
+                model(frame)
+                timings.append(round((time.perf_counter() - t0) * 1000, 1))
+            self.warmup_ms = timings
+
+            if self.on_ready is not None:
+                self.on_ready(model)
+            self.model = model
+            self.state = "ready"
+        except Exception as err:
+            self.error = f"{type(err).__name__}: {err}"
+            self.state = "failed"
+            print("MODEL LOAD ERROR:", self.error)
+        finally:
+            self._ready.set()
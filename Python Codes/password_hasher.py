@@ -0,0 +1,120 @@
+# password_hasher.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from batch_inference import percentile
+
+
+class HasherBusy(Exception):
+    """Raised when max_pending hash/verify jobs are already queued."""
+
+
+def hash_rounds(hashed):
+    """Work factor of a bcrypt hash such as b'$2b$12$...'; 0 if unreadable."""
+    try:
+        return int(hashed.split(b"$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """
+    bcrypt on its own small thread pool.
+
+    A cohort logging in at once would otherwise run one bcrypt per request
+    thread and take every core away from detection. Here at most `workers`
+    hashes run at a time and at most `max_pending` wait; beyond that
+    HasherBusy is raised so the route can ask the client to retry. A call
+    that waits longer than `timeout` raises concurrent.futures.TimeoutError;
+    its job is cancelled if it has not started, and otherwise keeps its
+    slot until bcrypt returns, so abandoned work still counts as pending.
+
+    verify() reports a replacement hash when a stored hash was made with a
+    different work factor, so changing `rounds` upgrades users as they log in.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_pending=256, stats_window=1000):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=stats_window)
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rehashed = 0
+
+    # ---------------- PUBLIC API ----------------
+    def hash(self, password, timeout=30):
+        return self._run(self._hash, password, timeout=timeout)
+
+    def verify(self, password, hashed, timeout=30):
+        """Returns (ok, new_hash); new_hash is None unless the stored hash needs upgrading."""
+        if isinstance(hashed, str):
+            hashed = hashed.encode()
+        return self._run(self._verify, password, hashed, timeout=timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = list(self._latencies)
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "rehashed": self.rehashed,
+                "ms_p50": round(percentile(latencies, 50) * 1000, 1),
+                "ms_p99": round(percentile(latencies, 99) * 1000, 1),
+            }
+
+    # ---------------- WORKER ----------------
+    def _run(self, fn, *args, timeout):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HasherBusy()
+
+        started = time.perf_counter()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the job ends, not when the caller stops waiting for it
+        future.add_done_callback(lambda f: self._finished(f, started))
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._stats_lock:
+                self.timed_out += 1
+            raise
+
+    def _finished(self, future, started):
+        self._slots.release()
+        if not future.cancelled():
+            with self._stats_lock:
+                self.completed += 1
+                self._latencies.append(time.perf_counter() - started)
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password, bcrypt.gensalt(self.rounds))
+
+    def _verify(self, password, hashed):
+        if not bcrypt.checkpw(password, hashed):
+            return False, None
+        if hash_rounds(hashed) == self.rounds:
+            return True, None
+        with self._stats_lock:
+            self.rehashed += 1
+        return True, self._hash(password)
@@ -0,0 +1,146 @@
+# proctor_stream.py
+import json
+import threading
+import time
+
+
+class LatestFrameSlot:
+    """
+    Single-slot mailbox between a socket reader and the detection loop.
+    A new frame replaces one that has not been picked up yet, so a slow
+    verdict never lets stale frames queue up behind it.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def take(self):
+        """Block until a frame arrives; returns None once the slot is closed."""
+        with self._cond:
+            while self._frame is None and not self._closed:
+                self._cond.wait()
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class TransportStats:
+    """
+    Per-transport counters so the HTTP and WebSocket paths can be compared
+    per student. cpu_ms is handler-thread CPU (framing, parsing, decode);
+    model inference runs on the scheduler thread and is not included.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = set()
+        self.active_connections = 0
+        self.connections = 0
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def opened(self, user_id):
+        with self._lock:
+            self._users.add(user_id)
+            self.active_connections += 1
+            self.connections += 1
+
+    def closed(self, dropped=0):
+        with self._lock:
+            self.active_connections -= 1
+            self.dropped += dropped
+
+    def record(self, user_id, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            self._users.add(user_id)
+            self.frames += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+
+    def snapshot(self):
+        with self._lock:
+            students = len(self._users) or 1
+            return {
+                "students": len(self._users),
+                "active_connections": self.active_connections,
+                "connections": self.connections,
+                "frames": self.frames,
+                "dropped_frames": self.dropped,
+                "bytes_in_per_student": self.bytes_in // students,
+                "bytes_out_per_student": self.bytes_out // students,
+                "cpu_ms_per_student": round(self.cpu_seconds * 1000 / students, 2),
+                "cpu_ms_per_frame": round(self.cpu_seconds * 1000 / self.frames, 3) if self.frames else 0.0,
+            }
+
+
+def serve_proctor_stream(ws, user_id, handle_frame, handle_event, stats, closed_errors=()):
+    """
+    Run one student's proctoring stream on a flask-sock WebSocket.
+
+    Binary messages are JPEG frames and go through the latest-frame slot;
+    text messages are JSON events such as {"type": "Tab Switch"}. Each
+    processed frame is answered with one JSON verdict, and each event with
+    {"event": type, ...} carrying whatever handle_event returned.
+    """
+    slot = LatestFrameSlot()
+    send_lock = threading.Lock()
+    stats.opened(user_id)
+
+    def send(payload):
+        # Verdicts go out from this thread, event replies from the reader
+        with send_lock:
+            ws.send(payload)
+
+    def reader():
+        try:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                if isinstance(message, (bytes, bytearray)):
+                    slot.put(message)
+                else:
+                    event_type = json.loads(message).get("type", "Unknown")
+                    reply = handle_event(event_type)
+                    send(json.dumps({"event": event_type, **(reply or {})}))
+        except closed_errors:
+            pass
+        except Exception as err:
+            print("STREAM ERROR:", err)
+        finally:
+            slot.close()
+
+    threading.Thread(target=reader, name=f"proctor-reader-{user_id}", daemon=True).start()
+
+    try:
+        while True:
+            frame = slot.take()
+            if frame is None:
+                break
+            start = time.thread_time()
+            payload = json.dumps(handle_frame(frame))
+            send(payload)
+            stats.record(user_id, len(frame), len(payload), time.thread_time() - start)
+    except closed_errors:
+        pass
+    finally:
+        slot.close()
+        stats.closed(slot.dropped)
@@ -0,0 +1,99 @@
+# proctoring_events.py
+import time
+
+# Column order of an event row, as queued with EventWriter.log(..., event=row)
+EVENT_COLUMNS = ("user_id", "session_id", "ts", "event_type", "object_label", "confidence", "emotion")
+
+INSERT_EVENT = f"""
+    INSERT INTO proctoring_events ({", ".join(EVENT_COLUMNS)})
+    VALUES ({", ".join("?" for _ in EVENT_COLUMNS)})
+"""
+
+# Client-supplied ids outside SQLite's signed 64-bit INTEGER can't be bound
+MAX_USER_ID = 2**63 - 1
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def make_event(user_id, session_id, event_type, object_label=None, confidence=None, emotion=None, ts=None):
+    """Build an event row; returns None when user_id is not a real user id."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    if not 0 < user_id <= MAX_USER_ID:
+        return None
+    return (user_id, session_id, ts if ts is not None else time.time(),
+            event_type, object_label, confidence, emotion)
+
+
+class WriterEventSink:
+    """Sends each batch through a db_pool.DatabaseWriter as one executemany."""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def insert(self, rows):
+        self.writer.executemany(INSERT_EVENT, rows)
+
+    def close(self):
+        pass
+
+
+# ---------------- QUERIES ----------------
+def parse_cursor(raw):
+    """'<ts>:<id>' page cursor -> (ts, id), or None for the first page."""
+    if not raw:
+        return None
+    try:
+        ts, event_id = raw.split(":", 1)
+        return float(ts), int(event_id)
+    except ValueError:
+        return None
+
+
+def fetch_timeline(conn, user_id, cursor=None, limit=DEFAULT_PAGE_SIZE, event_type=None):
+    """
+    One page of a student's events, newest first.
+    Keyset-paged on (ts, id) so every page is an index range scan on
+    idx_events_user_ts, however deep the page is.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    sql = """
+        SELECT id, session_id, ts, event_type, object_label, confidence, emotion
+        FROM proctoring_events
+        WHERE user_id = ?
+    """
+    params = [user_id]
+
+    if cursor is not None:
+        sql += " AND (ts < ? OR (ts = ? AND id < ?))"
+        params += [cursor[0], cursor[0], cursor[1]]
+    if event_type:
+        sql += " AND event_type = ?"
+        params.append(event_type)
+
+    sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+    params.append(limit)
+
+    rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+    next_cursor = f"{rows[-1]['ts']}:{rows[-1]['id']}" if len(rows) == limit else None
+    return rows, next_cursor
+
+
+def count_by_type(conn, user_id=None, since=None):
+    sql = "SELECT event_type, COUNT(*) AS total FROM proctoring_events"
+    clauses, params = [], []
+
+    if user_id is not None:
+        clauses.append("user_id = ?")
+        params.append(user_id)
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    sql += " GROUP BY event_type"
+    return {row[0]: row[1] for row in conn.execute(sql, params).fetchall()}
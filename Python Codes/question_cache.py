@@ -0,0 +1,212 @@
+# question_cache.py
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+SubjectQuestions = namedtuple("SubjectQuestions", ["version", "questions", "ids", "answers"])
+
+QUESTIONS_QUERY = """
+    SELECT q.*, s.name AS subject_name
+    FROM questions q
+    JOIN subjects s ON q.subject_id = s.id
+    WHERE q.subject_id=?
+    ORDER BY q.id
+"""
+
+ADMIN_PAGE_SIZE = 50
+BANK_VERSION_QUERY = "SELECT version FROM question_bank_version WHERE id = 1"
+OPTIONS = 4  # option1..option4; a submitted choice outside 1..OPTIONS counts as unanswered
+
+
+def parse_choice(raw):
+    try:
+        choice = int(raw)
+    except (TypeError, ValueError):
+        return 0
+    return choice if 1 <= choice <= OPTIONS else 0
+
+
+def grade(entry, answers):
+    """(score, total) of a submitted form such as request.form against a SubjectQuestions entry."""
+    selected = np.array([parse_choice(answers.get(f"q{qid}")) for qid in entry.ids], dtype=np.int64)
+    return int(np.count_nonzero(selected == entry.answers)), len(entry.ids)
+
+
+class QuestionBank:
+    """
+    Process-level cache of the subject catalog and per-subject question lists.
+
+    The bank only changes when an admin adds questions, so every student
+    starting an exam reads the same cached rows. Each subject also keeps
+    an answer-key array for grading. invalidate() bumps the version; a load
+    that raced with a write is not cached, so readers never keep stale data.
+
+    Writes made outside this process (question_import.py, database.py) are
+    noticed through the database's question_bank_version row, which
+    triggers bump on every question or subject change. It is read at most
+    once per check_interval seconds, so they show up within that time.
+    """
+
+    def __init__(self, connect, check_interval=2.0):
+        self._connect = connect
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._db_version = None
+        self._next_check = 0.0
+        self.version = 0
+        self._subjects = None
+        self._questions = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------- SUBJECTS ----------------
+    def subjects(self):
+        self._sync()
+        with self._lock:
+            if self._subjects is not None:
+                self.hits += 1
+                return self._subjects
+
+        with self._load_lock:
+            with self._lock:
+                if self._subjects is not None:
+                    return self._subjects
+                version = self.version
+                self.misses += 1
+
+            conn = self._connect()
+            try:
+                rows = conn.execute("SELECT * FROM subjects ORDER BY id").fetchall()
+            finally:
+                conn.close()
+            subjects = tuple(dict(row) for row in rows)
+
+            with self._lock:
+                if version == self.version:
+                    self._subjects = subjects
+            return subjects
+
+    def subject_ids(self):
+        return [s["id"] for s in self.subjects()]
+
+    def subject(self, subject_id):
+        for s in self.subjects():
+            if s["id"] == subject_id:
+                return s
+        return None
+
+    # ---------------- QUESTIONS ----------------
+    def questions(self, subject_id):
+        self._sync()
+        with self._lock:
+            cached = self._questions.get(subject_id)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        # One loader at a time, so a cohort starting together runs the query once
+        with self._load_lock:
+            with self._lock:
+                cached = self._questions.get(subject_id)
+                if cached is not None:
+                    return cached
+                version = self.version
+                self.misses += 1
+
+            conn = self._connect()
+            try:
+                rows = conn.execute(QUESTIONS_QUERY, (subject_id,)).fetchall()
+            finally:
+                conn.close()
+
+            questions = tuple(dict(row) for row in rows)
+            entry = SubjectQuestions(
+                version,
+                questions,
+                np.array([q["id"] for q in questions], dtype=np.int64),
+                np.array([int(q["correct_answer"]) for q in questions], dtype=np.int64),
+            )
+
+            with self._lock:
+                if version == self.version:
+                    self._questions[subject_id] = entry
+            return entry
+
+    # ---------------- INVALIDATION ----------------
+    def invalidate(self, subject_id=None):
+        """Drop one subject's questions, or everything when subject_id is None."""
+        with self._lock:
+            self.version += 1
+            if subject_id is None:
+                self._subjects = None
+                self._questions.clear()
+            else:
+                self._questions.pop(subject_id, None)
+
+    def _sync(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+
+        conn = self._connect()
+        try:
+            row = conn.execute(BANK_VERSION_QUERY).fetchone()
+        finally:
+            conn.close()
+        db_version = row[0] if row else None
+
+        with self._lock:
+            changed = self._db_version is not None and db_version != self._db_version
+            self._db_version = db_version
+        if changed:
+            self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "db_version": self._db_version,
+                "cached_subjects": len(self._questions),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# ---------------- ADMIN PAGES ----------------
+def parse_page_id(raw):
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def fetch_question_page(conn, subject_id=None, before_id=None, limit=ADMIN_PAGE_SIZE):
+    """
+    One page of questions for the admin dashboard, newest first.
+    Keyset-paged on id: a subject filter is a range scan on
+    idx_questions_subject_id, no filter walks the primary key.
+    Returns (rows, next_before_id).
+    """
+    sql = "SELECT id, subject_id, question, correct_answer FROM questions"
+    clauses, params = [], []
+
+    if subject_id is not None:
+        clauses.append("subject_id = ?")
+        params.append(subject_id)
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+
+    rows = conn.execute(sql, params).fetchall()
+    next_before = rows[-1]["id"] if len(rows) == limit else None
+    return rows, next_before
@@ -0,0 +1,230 @@
+# question_import.py
+"""
+Streaming bulk import of questions from CSV or JSON Lines.
+
+Both formats use the same fields, one question per row/line:
+
+    subject, question, option1, option2, option3, option4, correct_answer
+
+`subject` is the subject name (a numeric `subject_id` column works too) and
+`correct_answer` is 1-4. Rows are read one at a time, validated, and
+inserted in chunks of --chunk-size with one executemany per transaction,
+so the file is never held in memory. Invalid rows are skipped and
+reported with their line number. In JSON Lines, a numeric `subject` is
+taken as a subject id.
+
+Inserts bump the database's question bank version (see migrations.py),
+so a running app.py serves the new questions within a few seconds.
+
+    python question_import.py questions.csv
+    python question_import.py questions.jsonl --chunk-size 2000
+    python question_import.py questions.csv --dry-run
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+
+from db_pool import connect
+from migrations import apply_migrations
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "exam_system.db")
+
+INSERT_QUESTION = """
+    INSERT INTO questions
+    (subject_id, question, option1, option2, option3, option4, correct_answer)
+    VALUES (?,?,?,?,?,?,?)
+"""
+
+OPTION_FIELDS = ("option1", "option2", "option3", "option4")
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return None
+
+
+def iter_records(text_stream, fmt):
+    """Yield (line_no, record) pairs; record is a dict, or an error string for unparsable lines."""
+    if fmt == "csv":
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(text_stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as err:
+            yield line_no, f"invalid JSON: {err}"
+            continue
+        yield line_no, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def subject_lookup(subjects):
+    """Subject rows -> {lowercased name: id}, so every row resolves without a query."""
+    return {s["name"].strip().lower(): s["id"] for s in subjects}
+
+
+def validate_record(record, subject_ids):
+    """One parsed record -> INSERT_QUESTION parameters; raises ValueError with the reason."""
+    raw_subject, raw_id = record.get("subject"), record.get("subject_id")
+    if isinstance(raw_subject, int) and not isinstance(raw_subject, bool):
+        # A JSON number is an id, not a name
+        raw_subject, raw_id = None, raw_subject
+
+    subject = str(raw_subject or "").strip()
+    if subject:
+        subject_id = subject_ids.get(subject.lower())
+        if subject_id is None:
+            raise ValueError(f"unknown subject {subject!r}")
+    else:
+        try:
+            subject_id = int(raw_id)
+        except (TypeError, ValueError):
+            raise ValueError("missing subject")
+        if subject_id not in subject_ids.values():
+            raise ValueError(f"unknown subject_id {subject_id}")
+
+    question = str(record.get("question") or "").strip()
+    if not question:
+        raise ValueError("missing question")
+
+    options = [str(record.get(field) or "").strip() for field in OPTION_FIELDS]
+    missing = [field for field, text in zip(OPTION_FIELDS, options) if not text]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    try:
+        answer = int(record.get("correct_answer"))
+    except (TypeError, ValueError):
+        answer = 0
+    if not 1 <= answer <= len(OPTION_FIELDS):
+        raise ValueError("correct_answer must be 1-4")
+
+    return (subject_id, question, *options, answer)
+
+
+def import_questions(text_stream, fmt, subjects, insert_many, chunk_size=DEFAULT_CHUNK_SIZE,
+                     max_errors=MAX_REPORTED_ERRORS):
+    """
+    Stream records from text_stream into insert_many(rows), chunk_size rows at a time.
+
+    insert_many must write one chunk in one transaction (e.g.
+    DatabaseWriter.executemany). Returns a report dict; only the first
+    max_errors row errors are kept, the rest are just counted.
+    """
+    subject_ids = subject_lookup(subjects)
+    chunk = []
+    touched = set()
+    report = {"rows": 0, "inserted": 0, "invalid": 0, "failed": 0, "error_count": 0, "errors": []}
+
+    def error(line_no, message):
+        report["error_count"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"line": line_no, "error": message})
+
+    def flush(chunk, first_line):
+        try:
+            insert_many(chunk)
+        except Exception as err:
+            report["failed"] += len(chunk)
+            error(first_line, f"chunk of {len(chunk)} rows not inserted: {err}")
+            return
+        report["inserted"] += len(chunk)
+        touched.update(row[0] for row in chunk)
+
+    started = time.perf_counter()
+    first_line = None
+    for line_no, record in iter_records(text_stream, fmt):
+        report["rows"] += 1
+        try:
+            if isinstance(record, str):
+                raise ValueError(record)
+            row = validate_record(record, subject_ids)
+        except ValueError as err:
+            report["invalid"] += 1
+            error(line_no, str(err))
+            continue
+
+        if not chunk:
+            first_line = line_no
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush(chunk, first_line)
+            chunk = []
+
+    if chunk:
+        flush(chunk, first_line)
+
+    seconds = time.perf_counter() - started
+    report["seconds"] = round(seconds, 3)
+    report["rows_per_sec"] = round(report["rows"] / seconds, 1) if seconds else 0.0
+    report["subject_ids"] = sorted(touched)
+    return report
+
+
+def open_text(binary_stream):
+    """Wrap an uploaded/binary file for line-by-line decoding without reading it all."""
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, insert nothing")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot tell the format from the extension; pass --format")
+
+    # The version-bumping triggers must exist before anything is inserted
+    apply_migrations(args.db)
+    conn = connect(args.db)
+    subjects = conn.execute("SELECT id, name FROM subjects").fetchall()
+
+    def insert_many(rows):
+        if args.dry_run:
+            return
+        with conn:
+            conn.executemany(INSERT_QUESTION, rows)
+
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            report = import_questions(f, fmt, subjects, insert_many, args.chunk_size)
+    except UnicodeDecodeError as err:
+        raise SystemExit(f"{args.path} is not UTF-8 text ({err.reason}); "
+                         "rows before the first undecodable line may have been imported")
+    finally:
+        conn.close()
+
+    for err in report["errors"]:
+        print(f"line {err['line']}: {err['error']}")
+    hidden = report["error_count"] - len(report["errors"])
+    if hidden > 0:
+        print(f"... {hidden} more errors not shown")
+
+    action = "validated" if args.dry_run else "inserted"
+    print(f"{report['rows']} rows read, {report['inserted']} {action}, {report['invalid']} invalid, "
+          f"{report['failed']} failed in {report['seconds']}s ({report['rows_per_sec']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
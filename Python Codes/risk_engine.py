@@ -0,0 +1,310 @@
+# risk_engine.py
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from capture_policy import CAPTURE_TIERS
+
+# Same limits exam.html used to enforce in the browser
+MAX_VIOLATIONS = 3
+MAX_TAB_SWITCHES = 3
+
+# A cheating verdict only counts once it holds for this many consecutive frames,
+# so a single misdetection never costs the student a violation
+DEBOUNCE_FRAMES = 2
+
+# Sliding-window score: weighted events from the last RISK_WINDOW_SECONDS, RISK_SCALE of them = 1.0
+RISK_WINDOW_SECONDS = 60.0
+RISK_SCALE = 3.0
+RISK_WEIGHTS = {"violation": 1.0, "tab_switch": 1.0, "suspect": 0.25}
+
+# Fastest rate a client is told to send frames at; the ring must hold a whole risk window of them
+FRAME_INTERVAL_MS = min(tier["interval_ms"] for tier in CAPTURE_TIERS)
+
+# Per-entry flag bits in the ring
+SUSPECT = 1      # raw cheating verdict, not yet confirmed
+VIOLATION = 2    # verdict confirmed by the debounce
+TAB_SWITCH = 4
+
+EMOTIONS = ["Neutral", "Surprised", "Happy", "Angry", "Sad", "Disgust", "Fear", "Sleepy", "Tired", "Stress"]
+
+SessionRisk = namedtuple("SessionRisk", ["score", "violations", "tab_switches", "terminate", "reason"])
+NO_RISK = SessionRisk(0.0, 0, 0, False, None)
+
+
+class RiskEngine:
+    """
+    Server-side proctoring state for every live exam session.
+
+    All sessions share preallocated struct-of-arrays storage: each session
+    owns one row holding a ring of its last `window` entries (timestamp,
+    flags, object code, emotion code) plus its counters. Recording a frame
+    writes one ring entry and updates the counters, and the score reads a
+    fixed `window` entries, so both cost the same however long the exam
+    runs, and memory per session is fixed.
+
+    By default the ring holds risk_window worth of frames at the fastest
+    capture interval, plus room for the tab switches that end an exam; a
+    client sending faster than it is told to only shortens its own window.
+
+    Rows of sessions idle for idle_timeout are reclaimed by a periodic
+    sweep; when max_sessions rows are in use the least recently seen
+    session is evicted. A terminated session is remembered apart from the
+    rows, so neither eviction nor forget() (logout) clears it; its later
+    frames and events are not recorded and keep returning the final risk.
+    Those records follow the same bounds: at most max_sessions, least
+    recently used first, and dropped once idle for idle_timeout. The
+    caller keeps the durable record (see mark_terminated).
+    """
+
+    def __init__(self, window=None, risk_window=RISK_WINDOW_SECONDS, debounce_frames=DEBOUNCE_FRAMES,
+                 max_violations=MAX_VIOLATIONS, max_tab_switches=MAX_TAB_SWITCHES, weights=RISK_WEIGHTS,
+                 idle_timeout=900, max_sessions=10000, initial_capacity=1024, sweep_interval=30,
+                 frame_interval_ms=FRAME_INTERVAL_MS, on_terminate=None):
+        if window is None:
+            window = math.ceil(risk_window * 1000 / frame_interval_ms) + max_tab_switches
+        self.window = window
+        self.risk_window = risk_window
+        self.debounce_frames = debounce_frames
+        self.max_violations = max_violations
+        self.max_tab_switches = max_tab_switches
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.on_terminate = on_terminate
+
+        # Weight per flag combination, so scoring is one table lookup per entry
+        self._flag_weight = np.zeros(8, dtype=np.float32)
+        for flags in range(8):
+            if flags & VIOLATION:
+                self._flag_weight[flags] += weights.get("violation", 0.0)
+            elif flags & SUSPECT:
+                self._flag_weight[flags] += weights.get("suspect", 0.0)
+            if flags & TAB_SWITCH:
+                self._flag_weight[flags] += weights.get("tab_switch", 0.0)
+
+        self._emotions = {name: i for i, name in enumerate(EMOTIONS)}
+        self._objects = {None: 0}
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._keys = []
+        self._free = []
+        self._allocate(min(initial_capacity, max_sessions))
+        self._last_sweep = time.time()
+        self._ended_sessions = OrderedDict()  # session_id -> (final SessionRisk, last seen)
+        self.evicted = 0
+
+    # ---------------- STORAGE ----------------
+    def _allocate(self, capacity):
+        old = getattr(self, "capacity", 0)
+        w = self.window
+
+        def grow(name, shape, dtype):
+            arr = np.zeros(shape, dtype=dtype)
+            if old:
+                arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+
+        grow("_ts", (capacity, w), np.float64)
+        grow("_flags", (capacity, w), np.uint8)
+        grow("_object", (capacity, w), np.uint8)
+        grow("_emotion", (capacity, w), np.uint8)
+        grow("_head", capacity, np.uint16)
+        grow("_streak", capacity, np.uint16)
+        grow("_violations", capacity, np.uint16)
+        grow("_tab_switches", capacity, np.uint16)
+        grow("_last_seen", capacity, np.float64)
+        grow("_active", capacity, bool)
+
+        self._keys.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def _row(self, session_id, now):
+        row = self._rows.get(session_id)
+        if row is not None:
+            return row
+
+        if not self._free:
+            if self.capacity < self.max_sessions:
+                self._allocate(min(self.capacity * 2, self.max_sessions))
+            else:
+                idle = np.where(self._active, self._last_seen, np.inf)
+                self._release(self._keys[int(idle.argmin())])
+                self.evicted += 1
+
+        row = self._free.pop()
+        self._ts[row] = 0.0
+        self._flags[row] = 0
+        self._object[row] = 0
+        self._emotion[row] = 0
+        self._head[row] = self._streak[row] = 0
+        self._violations[row] = self._tab_switches[row] = 0
+        self._active[row] = True
+        self._last_seen[row] = now
+        self._rows[session_id] = row
+        self._keys[row] = session_id
+        return row
+
+    def _release(self, session_id):
+        row = self._rows.pop(session_id, None)
+        if row is not None:
+            self._active[row] = False
+            self._keys[row] = None
+            self._free.append(row)
+
+    def _push(self, row, now, flags, object_code=0, emotion_code=0):
+        i = self._head[row]
+        self._ts[row, i] = now
+        self._flags[row, i] = flags
+        self._object[row, i] = object_code
+        self._emotion[row, i] = emotion_code
+        self._head[row] = (i + 1) % self.window
+        self._last_seen[row] = now
+
+    # ---------------- SCORING ----------------
+    def _risk(self, row, now):
+        recent = self._ts[row] >= now - self.risk_window
+        weighted = float(self._flag_weight[self._flags[row][recent]].sum())
+        violations = int(self._violations[row])
+        tab_switches = int(self._tab_switches[row])
+
+        reason = None
+        if violations >= self.max_violations:
+            reason = "repeated cheating"
+        elif tab_switches >= self.max_tab_switches:
+            reason = "multiple tab switches"
+        return SessionRisk(min(1.0, weighted / RISK_SCALE), violations, tab_switches, reason is not None, reason)
+
+    # ---------------- PUBLIC API ----------------
+    def record_frame(self, session_id, cheating, object_label=None, emotion=None, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            ended = self._ended_risk(session_id, now)
+            if ended is not None:
+                return ended
+            row = self._row(session_id, now)
+
+            flags = 0
+            if cheating:
+                flags = SUSPECT
+                self._streak[row] += 1
+                if self._streak[row] % self.debounce_frames == 0:
+                    flags |= VIOLATION
+                    self._violations[row] += 1
+            else:
+                self._streak[row] = 0
+
+            object_code = self._objects.setdefault(object_label, min(len(self._objects), 255))
+            self._push(row, now, flags, object_code, self._emotions.get(emotion, 0))
+            risk = self._risk(row, now)
+            if risk.terminate:
+                self._end(session_id, risk, now)
+            self._maybe_sweep(now)
+        if risk.terminate:
+            self._notify(session_id, risk)
+        return risk
+
+    def record_tab_switch(self, session_id, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            ended = self._ended_risk(session_id, now)
+            if ended is not None:
+                return ended
+            row = self._row(session_id, now)
+            self._tab_switches[row] += 1
+            self._push(row, now, TAB_SWITCH)
+            risk = self._risk(row, now)
+            if risk.terminate:
+                self._end(session_id, risk, now)
+        if risk.terminate:
+            self._notify(session_id, risk)
+        return risk
+
+    def risk(self, session_id, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            ended = self._ended_risk(session_id, now)
+            if ended is not None:
+                return ended
+            row = self._rows.get(session_id)
+            return NO_RISK if row is None else self._risk(row, now)
+
+    def terminated(self, session_id, now=None):
+        """The final SessionRisk of a terminated session, or None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._ended_risk(session_id, now)
+
+    def mark_terminated(self, session_id, reason, now=None):
+        """Restore a termination recorded elsewhere (e.g. before a restart or after it aged out); no callback."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._ended_risk(session_id, now) is None:
+                self._end(session_id, SessionRisk(1.0, 0, 0, True, reason), now)
+
+    def forget(self, session_id):
+        """Free the session's row; a termination stays on record."""
+        with self._lock:
+            self._release(session_id)
+
+    def evict_idle(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._sweep(now)
+
+    def stats(self):
+        with self._lock:
+            arrays = (self._ts, self._flags, self._object, self._emotion, self._head, self._streak,
+                      self._violations, self._tab_switches, self._last_seen, self._active)
+            nbytes = sum(a.nbytes for a in arrays)
+            return {
+                "sessions": len(self._rows),
+                "capacity": self.capacity,
+                "bytes_per_session": nbytes // self.capacity,
+                "array_bytes": nbytes,
+                "evicted": self.evicted,
+                "terminated": len(self._ended_sessions),
+            }
+
+    def _ended_risk(self, session_id, now):
+        entry = self._ended_sessions.get(session_id)
+        if entry is None:
+            return None
+        self._ended_sessions[session_id] = (entry[0], now)
+        self._ended_sessions.move_to_end(session_id)
+        return entry[0]
+
+    def _end(self, session_id, risk, now):
+        self._ended_sessions[session_id] = (risk, now)
+        self._ended_sessions.move_to_end(session_id)
+        while len(self._ended_sessions) > self.max_sessions:
+            self._ended_sessions.popitem(last=False)
+        self._release(session_id)
+
+    def _notify(self, session_id, risk):
+        if self.on_terminate is not None:
+            self.on_terminate(session_id, risk)
+
+    # ---------------- EVICTION ----------------
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        ended = self._ended_sessions
+        while ended and next(iter(ended.values()))[1] < now - self.idle_timeout:
+            ended.popitem(last=False)
+
+        idle = self._active & (self._last_seen < now - self.idle_timeout)
+        if not idle.any():
+            return 0
+        rows = np.flatnonzero(idle).tolist()
+        for row in rows:
+            self._release(self._keys[row])
+        self.evicted += len(rows)
+        return len(rows)
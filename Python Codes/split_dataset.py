@@ -1,54 +1,272 @@
+# split_dataset.py
+"""
+Split Dataset/DataSets/{cheating,non_cheating} into train / val / test.
+
+Nothing is copied. By default the split is written to a manifest
+(Dataset/split_manifest.csv: split, class, path, sha1, phash, group);
+--mode hardlink or symlink also lays it out as Dataset/<split>/<class>/
+links for tools that want directories.
+
+Every file's SHA-1 and 64-bit difference hash (dHash of a downscaled
+grayscale decode) are computed by a process pool. Identical files and
+near-duplicates (dHash within --max-distance bits, found through
+banded buckets rather than all pairs) form one group, and a group is
+always placed in a single split, so consecutive webcam frames cannot
+leak from train into test. Groups are shuffled with a fixed seed and
+assigned per class towards the 70 / 15 / 15 ratios, so the same source
+always gives the same split.
+
+    python split_dataset.py
+    python split_dataset.py --mode symlink --clean
+    python split_dataset.py --seed 7 --max-distance 6 --workers 8
+"""
+import argparse
+import csv
+import hashlib
 import os
 import random
 import shutil
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, "..", "Dataset")
+SOURCE_DIR = os.path.join(DATASET_DIR, "DataSets")
+MANIFEST = os.path.join(DATASET_DIR, "split_manifest.csv")
+
+CLASSES = ["cheating", "non_cheating"]  # ✅ MATCH FOLDER NAMES
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+SPLITS = ["train", "val", "test"]
+RATIOS = {"train": 0.7, "val": 0.15, "test": 0.15}
+SEED = 42
+
+HASH_SIZE = 8             # dHash grid: 8 x 8 = 64 bits
+MAX_DISTANCE = 4          # dHash bits two near-duplicates may differ by
+POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+# ---------------- HASHING ----------------
+def dhash(gray):
+    small = cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hash_file(path):
+    """Pool worker: (sha1 hex, dHash or None if the image can't be decoded)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    # A reduced decode is plenty for an 8 x 9 thumbnail and much cheaper than a full one
+    gray = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    return hashlib.sha1(data).hexdigest(), dhash(gray) if gray is not None else None
+
+
+def list_sources(source_dir):
+    paths, labels = [], []
+    for label, cls in enumerate(CLASSES):
+        class_path = os.path.join(source_dir, cls)
+        for name in sorted(os.listdir(class_path)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_path, name))
+                labels.append(label)
+    return paths, labels
+
+
+# ---------------- GROUPING ----------------
+class DisjointSet:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def hamming(a, b):
+    """Bit distance between every hash in a (n,) and b (m,) -> (n, m)."""
+    xor = np.ascontiguousarray(a[:, None] ^ b[None, :])
+    return POPCOUNT8[xor.view(np.uint8)].reshape(len(a), len(b), 8).sum(-1)
+
+
+def near_duplicate_pairs(hashes, max_distance, chunk=256):
+    """
+    Index pairs whose hashes differ in at most max_distance bits.
+
+    The 64 bits are cut into max_distance + 1 bands; two hashes that close
+    must agree exactly on at least one band, so only hashes sharing a band
+    value are compared.
+    """
+    bands = max_distance + 1
+    edges = np.linspace(0, 64, bands + 1).astype(int)
+    pairs = set()
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        keys = (hashes >> np.uint64(lo)) & np.uint64((1 << (hi - lo)) - 1)
+        order = np.argsort(keys, kind="stable")
+        _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        for start, count in zip(starts[counts > 1], counts[counts > 1]):
+            members = order[start:start + count]
+            for i in range(0, count, chunk):
+                rows = members[i:i + chunk]
+                close = np.argwhere(hamming(hashes[rows], hashes[members]) <= max_distance)
+                pairs.update((int(rows[r]), int(members[c])) for r, c in close if rows[r] < members[c])
+    return pairs
+
+
+def group_files(digests, phashes, max_distance):
+    """Group index per file: identical content or a near-identical dHash puts files together."""
+    groups = DisjointSet(len(digests))
+    first = {}
+    for i, digest in enumerate(digests):
+        groups.union(first.setdefault(digest, i), i)
+
+    decoded = [i for i, h in enumerate(phashes) if h is not None]
+    if decoded:
+        unique, inverse = np.unique(np.array([phashes[i] for i in decoded], dtype=np.uint64),
+                                    return_inverse=True)
+        representative = {}
+        for i, u in zip(decoded, inverse):
+            groups.union(representative.setdefault(int(u), i), i)
+        for a, b in near_duplicate_pairs(unique, max_distance):
+            groups.union(representative[a], representative[b])
+
+    return [groups.find(i) for i in range(len(digests))]
+
+
+# ---------------- SPLITTING ----------------
+def assign_splits(groups, labels, seed=SEED, ratios=RATIOS):
+    """
+    Split per file, with every group in one split. Groups are visited in a
+    seeded shuffle and each goes to the split furthest below its target
+    for the group's (majority) class.
+    """
+    members = {}
+    for i, group in enumerate(groups):
+        members.setdefault(group, []).append(i)
+    order = sorted(members)
+    random.Random(seed).shuffle(order)
+
+    totals = Counter(labels)
+    placed = {cls: Counter() for cls in totals}
+    split_of = [None] * len(groups)
+    for group in order:
+        files = members[group]
+        cls = Counter(labels[i] for i in files).most_common(1)[0][0]
+        split = max(SPLITS, key=lambda s: ratios[s] * totals[cls] - placed[cls][s])
+        for i in files:
+            split_of[i] = split
+            placed[labels[i]][split] += 1
+    return split_of
 
-BASE_DIR = "Dataset"
-SOURCE_DIR = os.path.join(BASE_DIR, "DataSets")
 
-TRAIN_DIR = os.path.join(BASE_DIR, "train")
-VAL_DIR   = os.path.join(BASE_DIR, "val")
-TEST_DIR  = os.path.join(BASE_DIR, "test")
+# ---------------- OUTPUT ----------------
+def write_manifest(path, rows):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["split", "class", "path", "sha1", "phash", "group"])
+        writer.writerows(rows)
+    os.replace(tmp, path)
 
-TRAIN_RATIO = 0.7
-VAL_RATIO = 0.15
 
-classes = ["cheating", "non_cheating"]  # ✅ MATCH FOLDER NAMES
+def read_manifest(path, split):
+    """(paths, labels) of one split; labels are 1 for cheating, 0 for non_cheating."""
+    root = os.path.dirname(os.path.abspath(path))
+    paths, labels = [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["split"] == split:
+                paths.append(os.path.join(root, row["path"]))
+                labels.append(row["class"] == "cheating")
+    return paths, np.array(labels, dtype=bool)
 
-for split in [TRAIN_DIR, VAL_DIR, TEST_DIR]:
-    for cls in classes:
-        os.makedirs(os.path.join(split, cls), exist_ok=True)
 
-def split_class(class_name):
-    class_path = os.path.join(SOURCE_DIR, class_name)
+def link_splits(dataset_dir, paths, labels, split_of, mode, clean):
+    for split in SPLITS:
+        split_dir = os.path.join(dataset_dir, split)
+        if clean and os.path.isdir(split_dir):
+            shutil.rmtree(split_dir)
+        for cls in CLASSES:
+            class_dir = os.path.join(split_dir, cls)
+            os.makedirs(class_dir, exist_ok=True)
+            if os.listdir(class_dir):
+                raise SystemExit(f"{class_dir} is not empty; rerun with --clean to replace it")
 
-    images = [f for f in os.listdir(class_path)
-              if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+    for path, label, split in zip(paths, labels, split_of):
+        dst = os.path.join(dataset_dir, split, CLASSES[label], os.path.basename(path))
+        if mode == "hardlink":
+            os.link(path, dst)
+        else:
+            os.symlink(os.path.relpath(path, os.path.dirname(dst)), dst)
 
-    random.shuffle(images)
 
-    n_total = len(images)
-    n_train = int(n_total * TRAIN_RATIO)
-    n_val   = int(n_total * VAL_RATIO)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=SOURCE_DIR)
+    parser.add_argument("--dataset", default=DATASET_DIR, help="where the manifest and split directories go")
+    parser.add_argument("--mode", choices=("manifest", "hardlink", "symlink"), default="manifest")
+    parser.add_argument("--clean", action="store_true", help="remove existing split directories first")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--max-distance", type=int, default=MAX_DISTANCE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
 
-    train_imgs = images[:n_train]
-    val_imgs   = images[n_train:n_train + n_val]
-    test_imgs  = images[n_train + n_val:]
+    started = time.perf_counter()
+    paths, labels = list_sources(args.source)
+    if not paths:
+        print(f"No images under {args.source}")
+        return
 
-    for img in train_imgs:
-        shutil.copy(os.path.join(class_path, img),
-                    os.path.join(TRAIN_DIR, class_name, img))
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        hashes = list(pool.map(hash_file, paths, chunksize=64))
+    hash_seconds = time.perf_counter() - started
+    digests = [d for d, _ in hashes]
+    phashes = [h for _, h in hashes]
 
-    for img in val_imgs:
-        shutil.copy(os.path.join(class_path, img),
-                    os.path.join(VAL_DIR, class_name, img))
+    groups = group_files(digests, phashes, args.max_distance)
+    split_of = assign_splits(groups, labels, args.seed)
 
-    for img in test_imgs:
-        shutil.copy(os.path.join(class_path, img),
-                    os.path.join(TEST_DIR, class_name, img))
+    dataset_dir = os.path.abspath(args.dataset)
+    manifest = os.path.join(dataset_dir, os.path.basename(MANIFEST))
+    write_manifest(manifest, [
+        (split, CLASSES[label], os.path.relpath(path, dataset_dir), digest,
+         f"{phash:016x}" if phash is not None else "", group)
+        for path, label, split, digest, phash, group in zip(paths, labels, split_of, digests, phashes, groups)
+    ])
+    if args.mode != "manifest":
+        link_splits(dataset_dir, paths, labels, split_of, args.mode, args.clean)
+    seconds = time.perf_counter() - started
 
-    print(f"{class_name}: Train={len(train_imgs)}, Val={len(val_imgs)}, Test={len(test_imgs)}")
+    sizes = Counter(groups)
+    group_classes = {}
+    for group, label in zip(groups, labels):
+        group_classes.setdefault(group, set()).add(label)
+    for label, cls in enumerate(CLASSES):
+        counts = Counter(s for s, l in zip(split_of, labels) if l == label)
+        print(f"{cls}: Train={counts['train']}, Val={counts['val']}, Test={counts['test']}")
+    undecodable = sum(h is None for h in phashes)
+    mixed = sum(len(classes) > 1 for classes in group_classes.values())
+    print(f"{len(paths)} files, {len(set(digests))} unique, {sum(1 for n in sizes.values() if n > 1)} "
+          f"duplicate groups holding {sum(n for n in sizes.values() if n > 1)} files"
+          + (f", {mixed} spanning both classes" if mixed else "")
+          + (f", {undecodable} undecodable" if undecodable else ""))
+    print(f"Hashed in {hash_seconds:.1f}s ({len(paths) / hash_seconds:.0f} files/s), "
+          f"done in {seconds:.1f}s ({len(paths) / seconds:.0f} files/s)")
+    print(f"✅ Split written to {manifest}" + (f" and {args.mode}ed into {dataset_dir}" if args.mode != "manifest" else ""))
 
-for cls in classes:
-    split_class(cls)
 
-print("✅ Dataset split completed successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import pytest
+
+from db_pool import connect
+from migrations import HOT_QUERIES, MIGRATIONS, SCHEMA_VERSION, apply_migrations, check_query_plans, query_plan
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "exam_system.db")
+    assert apply_migrations(path) == (0, SCHEMA_VERSION)
+    conn = connect(path)
+    yield conn
+    conn.close()
+
+
+def test_fresh_database_reaches_latest_version(db):
+    assert db.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+
+def test_migrating_twice_is_a_no_op(tmp_path):
+    path = str(tmp_path / "exam_system.db")
+    apply_migrations(path)
+    assert apply_migrations(path) == (SCHEMA_VERSION, SCHEMA_VERSION)
+
+
+def test_older_database_is_upgraded(tmp_path):
+    path = str(tmp_path / "exam_system.db")
+    conn = connect(path, autocommit=True)
+    for sql in MIGRATIONS[0][2]:
+        conn.execute(sql)
+    conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+    assert apply_migrations(path) == (1, SCHEMA_VERSION)
+
+
+@pytest.mark.parametrize("name, table, index, sql, params", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_its_index(db, name, table, index, sql, params):
+    plan = query_plan(db, sql, params)
+    on_table = [step for step in plan if step.split(" ")[1:2] == [table]]
+    assert any(f"INDEX {index}" in step for step in on_table), plan
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in on_table), plan
+
+
+def test_check_query_plans_passes(db):
+    assert check_query_plans(db) == []
+
+
+def test_question_writes_bump_the_bank_version(db):
+    def version():
+        return db.execute("SELECT version FROM question_bank_version").fetchone()[0]
+
+    before = version()
+    with db:
+        db.execute("INSERT INTO questions (subject_id, question, option1, option2, option3, option4, correct_answer)"
+                   " VALUES (1, 'q', 'a', 'b', 'c', 'd', 1)")
+    assert version() == before + 1